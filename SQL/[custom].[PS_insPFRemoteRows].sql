@@ -0,0 +1,78 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Helper for the PowerFAIDS bulk procedures. Runs @Query on the PowerFAIDS linked server with OPENQUERY and inserts
+--				the rows into the caller's temp table @Target.
+--				The caller fills #Keys (k VARCHAR(50)) first. {keys} in @Query is replaced with a batch of the quoted key values,
+--				so the filter runs on the PowerFAIDS server instead of pulling whole tables across the link.
+--				OPENQUERY accepts at most 8 KB of query text, so the keys are sent in as many batches as needed.
+--				PowerFAIDS server/db names may need edited during deployment.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_insPFRemoteRows] @Target SYSNAME
+	,@Query VARCHAR(4000)
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	DECLARE @Placeholders INT = (LEN(@Query) - LEN(REPLACE(@Query, '{keys}', ''))) / LEN('{keys}')
+	DECLARE @MaxLength INT = (7900 - LEN(@Query)) / @Placeholders
+		,@Batch VARCHAR(8000) = ''
+		,@Key VARCHAR(110)
+		,@Fetch INT
+		,@sql NVARCHAR(max)
+
+	DECLARE keys_cursor CURSOR LOCAL FAST_FORWARD
+	FOR
+	SELECT DISTINCT k
+	FROM #Keys
+	WHERE k IS NOT NULL
+
+	OPEN keys_cursor
+
+	WHILE 1 = 1
+	BEGIN
+		FETCH NEXT
+		FROM keys_cursor
+		INTO @Key
+
+		SET @Fetch = @@FETCH_STATUS
+		SET @Key = '''' + REPLACE(@Key, '''', '''''') + ''''
+
+		--Run the batch once it's full or there are no more keys
+		IF @Batch > ''
+			AND (
+				@Fetch <> 0
+				OR LEN(@Batch) + 1 + LEN(@Key) > @MaxLength
+				)
+		BEGIN
+			SET @sql = N'INSERT INTO ' + QUOTENAME(@Target) + N' SELECT * FROM OPENQUERY([POWERFAIDS], ''' + REPLACE(REPLACE(@Query, '{keys}', @Batch), '''', '''''') + N''')'
+
+			EXEC (@sql)
+
+			SET @Batch = ''
+		END
+
+		IF @Fetch <> 0
+			BREAK
+
+		SET @Batch = @Batch + CASE
+				WHEN @Batch > ''
+					THEN ','
+				ELSE ''
+				END + @Key
+	END
+
+	CLOSE keys_cursor
+
+	DEALLOCATE keys_cursor
+END
+GO
@@ -0,0 +1,39 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Return which of many Year/Term/Session combinations exist in ACADEMICCALENDAR.
+--				@YTS is a JSON array like [{"Year": "2026", "Term": "FALL", "Session": "01"}].
+--				Combinations are returned as passed in; missing combinations are not returned.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_selAcademicCalendarBulk] @YTS NVARCHAR(max)
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	SELECT j.[Year]
+		,j.Term
+		,j.[Session]
+	FROM OPENJSON(@YTS) WITH (
+			[Year] NVARCHAR(4)
+			,Term NVARCHAR(10)
+			,[Session] NVARCHAR(10)
+			) j
+	WHERE EXISTS (
+			SELECT *
+			FROM ACADEMICCALENDAR
+			WHERE ACADEMIC_YEAR = j.[Year]
+				AND ACADEMIC_TERM = j.Term
+				AND ACADEMIC_SESSION = j.[Session]
+			)
+END
+GO
+
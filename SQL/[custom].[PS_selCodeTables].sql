@@ -0,0 +1,136 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Return the code values checked by PS_updStop, PS_updScholarships, PS_updAssociation, PS_updTestscore, PS_updEducation,
+--				PS_updAction, and PS_selActionDefinition, so rows can be validated before they are sent.
+--				One row per code value: TableName, CodeValue, and CodeValue2 for tables keyed on two values.
+--				CODE_TESTLINK is TEST/TYPE, SCHOLARSHIPLEVELS is SCHOLARSHIP_ID/LEVEL, ACTION is ACTION_ID/STATUS,
+--				and ORGANIZATION is ORG_IDENTIFIER/ORG_CODE_ID.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_selCodeTables]
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	SELECT 'CODE_STOPLIST' AS [TableName]
+		,CODE_VALUE_KEY AS [CodeValue]
+		,NULL AS [CodeValue2]
+	FROM CODE_STOPLIST
+
+	UNION ALL
+
+	SELECT 'SCHOLARSHIP'
+		,SCHOLARSHIP_ID
+		,NULL
+	FROM SCHOLARSHIP
+
+	UNION ALL
+
+	SELECT 'CODE_DEPARTMENT'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_DEPARTMENT
+
+	UNION ALL
+
+	SELECT 'CODE_SCHOLARSHIPLEVEL'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_SCHOLARSHIPLEVEL
+
+	UNION ALL
+
+	SELECT 'SCHOLARSHIPLEVELS'
+		,SCHOLARSHIP_ID
+		,[LEVEL]
+	FROM SCHOLARSHIPLEVELS
+
+	UNION ALL
+
+	SELECT 'CODE_ASSOCIATION'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_ASSOCIATION
+
+	UNION ALL
+
+	SELECT 'CODE_OFFICEHELD'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_OFFICEHELD
+
+	UNION ALL
+
+	SELECT 'CODE_TEST'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_TEST
+
+	UNION ALL
+
+	SELECT 'CODE_TESTTYPE'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_TESTTYPE
+
+	UNION ALL
+
+	SELECT 'CODE_TESTLINK'
+		,TEST
+		,[TYPE]
+	FROM CODE_TESTLINK
+
+	UNION ALL
+
+	SELECT 'CODE_DEGREE'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_DEGREE
+
+	UNION ALL
+
+	SELECT 'CODE_CURRICULUM'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_CURRICULUM
+
+	UNION ALL
+
+	SELECT 'CODE_HONORS'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_HONORS
+
+	UNION ALL
+
+	SELECT 'CODE_WAIVEDREASON'
+		,CODE_VALUE_KEY
+		,NULL
+	FROM CODE_WAIVEDREASON
+
+	UNION ALL
+
+	SELECT 'ACTION'
+		,ACTION_ID
+		,[STATUS]
+	FROM [ACTION]
+
+	UNION ALL
+
+	SELECT 'ORGANIZATION'
+		,ORG_IDENTIFIER
+		,ORG_CODE_ID
+	FROM ORGANIZATION
+	WHERE ORG_IDENTIFIER IS NOT NULL
+END
+GO
+
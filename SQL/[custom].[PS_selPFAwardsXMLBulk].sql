@@ -0,0 +1,340 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Set-based version of PS_selPFAwardsXML for many applications at once.
+--				@Apps is a JSON array like [{"aid": "guid", "PCID": "P000000001", "GovID": "123456789", "AcademicYear": "2026", "AcademicTerm": "FALL", "AcademicSession": "01"}].
+--				Students, POE's, and award years are resolved for all applications together. PowerFAIDS rows are fetched with
+--				PS_insPFRemoteRows, which sends the keys to the linked server so only matching rows come back.
+--				Returns aid, XML, and tracking_status. Applications whose student isn't found in PowerFAIDS are not returned.
+--				@UseFINAIDMAPPING toggles between selecting a single POE from ACADEMICCALENDAR or selecting multiple POE's from FINAIDMAPPING.
+--				PowerFAIDS server/db names may need edited during deployment.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_selPFAwardsXMLBulk] @Apps NVARCHAR(max)
+	,@UseFINAIDMAPPING BIT = 0
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	CREATE TABLE #Apps (
+		aid NVARCHAR(50) PRIMARY KEY
+		,PCID NVARCHAR(10)
+		,GovID VARCHAR(9)
+		,AcademicYear NVARCHAR(4)
+		,AcademicTerm NVARCHAR(10)
+		,AcademicSession NVARCHAR(10)
+		,student_token INT
+		)
+	CREATE TABLE #Students (
+		student_token INT
+		,alternate_id VARCHAR(20)
+		,student_ssn VARCHAR(9)
+		)
+	CREATE TABLE #POEs (
+		aid NVARCHAR(50)
+		,POE INT
+		,ACADEMIC_SESSION NVARCHAR(10)
+		,award_year INT
+		)
+	CREATE TABLE #RemotePOEs (
+		poe_token INT
+		,award_year_token INT
+		)
+	CREATE TABLE #RemoteAwardYears (
+		stu_award_year_token INT
+		,student_token INT
+		,award_year_token INT
+		,tracking_status VARCHAR(2)
+		)
+	CREATE TABLE #RemoteAwards (
+		stu_award_year_token INT
+		,fund_long_name VARCHAR(40)
+		,net_disbursement_amount NUMERIC(8, 2)
+		,scheduled_amount NUMERIC(8, 2)
+		,attend_desc VARCHAR(30)
+		)
+	CREATE TABLE #Keys (k VARCHAR(50))
+	CREATE TABLE #AwardYears (
+		aid NVARCHAR(50)
+		,stu_award_year_token INT
+		,tracking_status VARCHAR(2)
+		)
+	CREATE TABLE #AwardsRaw (
+		aid NVARCHAR(50)
+		,[fund_long_name] VARCHAR(40)
+		,[amount] NUMERIC(8, 2)
+		,[attend_desc] VARCHAR(30)
+		)
+
+	INSERT INTO #Apps
+	SELECT aid
+		,PCID
+		,GovID
+		,AcademicYear
+		,AcademicTerm
+		,AcademicSession
+		,NULL
+	FROM OPENJSON(@Apps) WITH (
+			aid NVARCHAR(50)
+			,PCID NVARCHAR(10)
+			,GovID VARCHAR(9)
+			,AcademicYear NVARCHAR(4)
+			,AcademicTerm NVARCHAR(10)
+			,AcademicSession NVARCHAR(10)
+			)
+
+	--Find students
+	INSERT INTO #Keys
+	SELECT PCID
+	FROM #Apps
+
+	EXEC [custom].[PS_insPFRemoteRows] '#Students'
+		,'SELECT student_token, alternate_id, student_ssn FROM [PFaids].[dbo].[student] WHERE alternate_id IN ({keys})'
+
+	TRUNCATE TABLE #Keys
+
+	INSERT INTO #Keys
+	SELECT GovID
+	FROM #Apps
+
+	EXEC [custom].[PS_insPFRemoteRows] '#Students'
+		,'SELECT student_token, alternate_id, student_ssn FROM [PFaids].[dbo].[student] WHERE student_ssn IN ({keys})'
+
+	UPDATE a
+	SET student_token = (
+			SELECT MAX(s.student_token)
+			FROM #Students s
+			WHERE s.alternate_id = a.PCID
+				OR s.student_ssn = a.GovID
+			)
+	FROM #Apps a
+
+	IF @UseFINAIDMAPPING = 1
+	BEGIN
+		--Get POEs from FINAIDMAPPING
+		INSERT INTO #POEs
+		SELECT a.aid
+			,fm.POE
+			,fm.ACADEMIC_SESSION
+			,NULL
+		FROM #Apps a
+		INNER JOIN FINAIDMAPPING fm
+			ON fm.ACADEMIC_YEAR = a.AcademicYear
+				AND fm.ACADEMIC_TERM = a.AcademicTerm
+				AND (
+					fm.ACADEMIC_SESSION = a.AcademicSession
+					OR fm.ACADEMIC_SESSION = ''
+					)
+				AND fm.[STATUS] = 'A'
+		WHERE a.student_token IS NOT NULL
+
+		--If an app's POE's are mapped by Session, delete its POE's with blank session
+		DELETE p
+		FROM #POEs p
+		WHERE p.ACADEMIC_SESSION = ''
+			AND EXISTS (
+				SELECT *
+				FROM #POEs p2
+				WHERE p2.aid = p.aid
+					AND p2.ACADEMIC_SESSION > ''
+				)
+
+		--Get Aid Year by POE from PowerFAIDS
+		TRUNCATE TABLE #Keys
+
+		INSERT INTO #Keys
+		SELECT POE
+		FROM #POEs
+
+		EXEC [custom].[PS_insPFRemoteRows] '#RemotePOEs'
+			,'SELECT poe_token, award_year_token FROM [PFaids].[dbo].[poe] WHERE poe_token IN ({keys})'
+
+		UPDATE p_local
+		SET award_year = p_remote.award_year_token
+		FROM #POEs p_local
+		INNER JOIN #RemotePOEs p_remote
+			ON p_local.POE = p_remote.poe_token
+	END
+	ELSE
+	BEGIN
+		--Get single POE from ACADEMICCALENDAR
+		INSERT INTO #POEs
+		SELECT a.aid
+			,NULL
+			,a.AcademicSession
+			,ac.FIN_AID_YEAR
+		FROM #Apps a
+		INNER JOIN ACADEMICCALENDAR ac
+			ON ac.ACADEMIC_YEAR = a.AcademicYear
+				AND ac.ACADEMIC_TERM = a.AcademicTerm
+				AND ac.ACADEMIC_SESSION = a.AcademicSession
+		WHERE a.student_token IS NOT NULL
+	END
+
+	--Get award years and tracking status
+	TRUNCATE TABLE #Keys
+
+	INSERT INTO #Keys
+	SELECT student_token
+	FROM #Apps
+
+	EXEC [custom].[PS_insPFRemoteRows] '#RemoteAwardYears'
+		,'SELECT stu_award_year_token, student_token, award_year_token, tracking_status FROM [PFaids].[dbo].[stu_award_year] WHERE student_token IN ({keys})'
+
+	--Award years are matched with IN, like PS_selPFAwardsXML, so an award year with several POE's isn't repeated
+	INSERT INTO #AwardYears
+	SELECT a.aid
+		,say.stu_award_year_token
+		,say.tracking_status
+	FROM #Apps a
+	INNER JOIN #RemoteAwardYears say
+		ON say.student_token = a.student_token
+	WHERE say.award_year_token IN (
+			SELECT p.award_year
+			FROM #POEs p
+			WHERE p.aid = a.aid
+			)
+
+	--Get raw award data
+	TRUNCATE TABLE #Keys
+
+	INSERT INTO #Keys
+	SELECT stu_award_year_token
+	FROM #AwardYears
+
+	EXEC [custom].[PS_insPFRemoteRows] '#RemoteAwards'
+		,'SELECT sa.stu_award_year_token, fund_long_name, net_disbursement_amount, scheduled_amount, attend_desc
+			FROM [PFaids].[dbo].[stu_award] sa
+			INNER JOIN [PFaids].[dbo].[stu_award_transactions] sat ON sat.stu_award_token = sa.stu_award_token
+			INNER JOIN [PFaids].[dbo].[funds] f ON f.fund_token = sa.fund_ay_token
+			INNER JOIN [PFaids].[dbo].[poe] ON poe.poe_token = sat.poe_token
+			WHERE sa.stu_award_year_token IN ({keys})'
+
+	INSERT INTO #AwardsRaw
+	SELECT ay.aid
+		,CASE
+			WHEN net_disbursement_amount > 0
+				AND net_disbursement_amount <> scheduled_amount
+				THEN fund_long_name + ' (Net)'
+			ELSE fund_long_name
+			END [fund_long_name]
+		,CASE
+			WHEN net_disbursement_amount > 0
+				AND net_disbursement_amount <> scheduled_amount
+				THEN net_disbursement_amount
+			ELSE scheduled_amount
+			END [amount]
+		,CASE
+			WHEN attend_desc LIKE '%sp%'
+				THEN 'Spring'
+			WHEN attend_desc LIKE '%fa%'
+				THEN 'Fall'
+			WHEN attend_desc LIKE '%su%'
+				THEN 'Summer'
+			END AS [attend_desc]
+	FROM #AwardYears ay
+	INNER JOIN #RemoteAwards ra
+		ON ra.stu_award_year_token = ay.stu_award_year_token
+
+	--Format awards as XML, same as PS_selPFAwardsXML
+	SELECT a.aid
+		,(
+			SELECT (
+					SELECT 'fund_long_name' AS [k]
+						,fund_long_name AS [v]
+					FOR XML path('p')
+						,type
+					)
+				,(
+					SELECT 'Summer' AS [k]
+						,FORMAT(Summer, 'C0') AS [v]
+					FOR XML path('p')
+						,type
+					)
+				,(
+					SELECT 'Fall' AS [k]
+						,FORMAT(Fall, 'C0') AS [v]
+					FOR XML path('p')
+						,type
+					)
+				,(
+					SELECT 'Spring' AS [k]
+						,FORMAT(Spring, 'C0') AS [v]
+					FOR XML path('p')
+						,type
+					)
+				,(
+					SELECT 'Total' AS [k]
+						,FORMAT(Total, 'C0') AS [v]
+					FOR XML path('p')
+						,type
+					)
+			FROM (
+				--Individual awards
+				SELECT [fund_long_name]
+					,[Summer]
+					,[Fall]
+					,[Spring]
+					,COALESCE([Summer], 0) + COALESCE([Fall], 0) + COALESCE([Spring], 0) AS Total
+				FROM (
+					SELECT [fund_long_name]
+						,[amount]
+						,[attend_desc]
+					FROM #AwardsRaw r
+					WHERE r.aid = a.aid
+					) r
+				PIVOT(SUM([amount]) FOR attend_desc IN (
+							[Summer]
+							,[Fall]
+							,[Spring]
+							)) xx
+
+				UNION ALL
+
+				--Grand total
+				SELECT 'Totals' AS [fund_long_name]
+					,[Summer]
+					,[Fall]
+					,[Spring]
+					,COALESCE([Summer], 0) + COALESCE([Fall], 0) + COALESCE([Spring], 0) AS Total
+				FROM (
+					SELECT [fund_long_name]
+						,[amount]
+						,[attend_desc]
+					FROM #AwardsRaw r
+					WHERE r.aid = a.aid
+					) r
+				PIVOT(SUM([amount]) FOR attend_desc IN (
+							[Summer]
+							,[Fall]
+							,[Spring]
+							)) xx
+				) x
+			--Remove empty lines
+			WHERE [Total] > 0
+			ORDER BY CASE fund_long_name
+					WHEN 'Totals'
+						THEN 'zzzz'
+					ELSE fund_long_name
+					END
+			FOR XML path('row')
+				,type
+			) AS [XML]
+		,(
+			SELECT MAX(tracking_status)
+			FROM #AwardYears ay
+			WHERE ay.aid = a.aid
+			) AS [tracking_status]
+	FROM #Apps a
+	WHERE a.student_token IS NOT NULL
+END
+GO
+
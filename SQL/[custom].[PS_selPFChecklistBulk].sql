@@ -0,0 +1,213 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Set-based version of PS_selPFChecklist for many applications at once.
+--				@Apps is a JSON array like [{"aid": "guid", "AppID": "123", "PCID": "P000000001", "GovID": "123456789", "AcademicYear": "2026", "AcademicTerm": "FALL", "AcademicSession": "01"}].
+--				Students, POE's, and award years are resolved for all applications together. PowerFAIDS rows are fetched with
+--				PS_insPFRemoteRows, which sends the keys to the linked server so only matching rows come back.
+--				Returns the missing documents list for all applications, tagged with the Slate AppID.
+--				@UseFINAIDMAPPING toggles between selecting a single POE from ACADEMICCALENDAR or selecting multiple POE's from FINAIDMAPPING.
+--				PowerFAIDS server/db names may need edited during deployment.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_selPFChecklistBulk] @Apps NVARCHAR(max)
+	,@UseFINAIDMAPPING BIT = 0
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	CREATE TABLE #Apps (
+		aid NVARCHAR(50) PRIMARY KEY
+		,AppID NVARCHAR(50)
+		,PCID NVARCHAR(10)
+		,GovID VARCHAR(9)
+		,AcademicYear NVARCHAR(4)
+		,AcademicTerm NVARCHAR(10)
+		,AcademicSession NVARCHAR(10)
+		,student_token INT
+		)
+	CREATE TABLE #Students (
+		student_token INT
+		,alternate_id VARCHAR(20)
+		,student_ssn VARCHAR(9)
+		)
+	CREATE TABLE #POEs (
+		aid NVARCHAR(50)
+		,POE INT
+		,ACADEMIC_SESSION NVARCHAR(10)
+		,award_year INT
+		)
+	CREATE TABLE #RemotePOEs (
+		poe_token INT
+		,award_year_token INT
+		)
+	CREATE TABLE #AwardYears (
+		stu_award_year_token INT
+		,student_token INT
+		,award_year_token INT
+		)
+	CREATE TABLE #Documents (
+		stu_award_year_token INT
+		,doc_token INT
+		,doc_status_desc VARCHAR(100)
+		,status_effective_dt DATETIME
+		)
+	CREATE TABLE #Keys (k VARCHAR(50))
+
+	INSERT INTO #Apps
+	SELECT aid
+		,AppID
+		,PCID
+		,GovID
+		,AcademicYear
+		,AcademicTerm
+		,AcademicSession
+		,NULL
+	FROM OPENJSON(@Apps) WITH (
+			aid NVARCHAR(50)
+			,AppID NVARCHAR(50)
+			,PCID NVARCHAR(10)
+			,GovID VARCHAR(9)
+			,AcademicYear NVARCHAR(4)
+			,AcademicTerm NVARCHAR(10)
+			,AcademicSession NVARCHAR(10)
+			)
+
+	--Find students
+	INSERT INTO #Keys
+	SELECT PCID
+	FROM #Apps
+
+	EXEC [custom].[PS_insPFRemoteRows] '#Students'
+		,'SELECT student_token, alternate_id, student_ssn FROM [PFaids].[dbo].[student] WHERE alternate_id IN ({keys})'
+
+	TRUNCATE TABLE #Keys
+
+	INSERT INTO #Keys
+	SELECT GovID
+	FROM #Apps
+
+	EXEC [custom].[PS_insPFRemoteRows] '#Students'
+		,'SELECT student_token, alternate_id, student_ssn FROM [PFaids].[dbo].[student] WHERE student_ssn IN ({keys})'
+
+	UPDATE a
+	SET student_token = (
+			SELECT MAX(s.student_token)
+			FROM #Students s
+			WHERE s.alternate_id = a.PCID
+				OR s.student_ssn = a.GovID
+			)
+	FROM #Apps a
+
+	IF @UseFINAIDMAPPING = 1
+	BEGIN
+		--Get POEs from FINAIDMAPPING
+		INSERT INTO #POEs
+		SELECT a.aid
+			,fm.POE
+			,fm.ACADEMIC_SESSION
+			,NULL
+		FROM #Apps a
+		INNER JOIN FINAIDMAPPING fm
+			ON fm.ACADEMIC_YEAR = a.AcademicYear
+				AND fm.ACADEMIC_TERM = a.AcademicTerm
+				AND (
+					fm.ACADEMIC_SESSION = a.AcademicSession
+					OR fm.ACADEMIC_SESSION = ''
+					)
+				AND fm.[STATUS] = 'A'
+		WHERE a.student_token IS NOT NULL
+
+		--If an app's POE's are mapped by Session, delete its POE's with blank session
+		DELETE p
+		FROM #POEs p
+		WHERE p.ACADEMIC_SESSION = ''
+			AND EXISTS (
+				SELECT *
+				FROM #POEs p2
+				WHERE p2.aid = p.aid
+					AND p2.ACADEMIC_SESSION > ''
+				)
+
+		--Get Aid Year by POE from PowerFAIDS
+		TRUNCATE TABLE #Keys
+
+		INSERT INTO #Keys
+		SELECT POE
+		FROM #POEs
+
+		EXEC [custom].[PS_insPFRemoteRows] '#RemotePOEs'
+			,'SELECT poe_token, award_year_token FROM [PFaids].[dbo].[poe] WHERE poe_token IN ({keys})'
+
+		UPDATE p_local
+		SET award_year = p_remote.award_year_token
+		FROM #POEs p_local
+		INNER JOIN #RemotePOEs p_remote
+			ON p_local.POE = p_remote.poe_token
+	END
+	ELSE
+	BEGIN
+		--Get single POE from ACADEMICCALENDAR
+		INSERT INTO #POEs
+		SELECT a.aid
+			,NULL
+			,a.AcademicSession
+			,ac.FIN_AID_YEAR
+		FROM #Apps a
+		INNER JOIN ACADEMICCALENDAR ac
+			ON ac.ACADEMIC_YEAR = a.AcademicYear
+				AND ac.ACADEMIC_TERM = a.AcademicTerm
+				AND ac.ACADEMIC_SESSION = a.AcademicSession
+		WHERE a.student_token IS NOT NULL
+	END
+
+	--Get award years, then their required documents, from PowerFAIDS
+	TRUNCATE TABLE #Keys
+
+	INSERT INTO #Keys
+	SELECT student_token
+	FROM #Apps
+
+	EXEC [custom].[PS_insPFRemoteRows] '#AwardYears'
+		,'SELECT stu_award_year_token, student_token, award_year_token FROM [PFaids].[dbo].[stu_award_year] WHERE student_token IN ({keys})'
+
+	TRUNCATE TABLE #Keys
+
+	INSERT INTO #Keys
+	SELECT stu_award_year_token
+	FROM #AwardYears
+
+	EXEC [custom].[PS_insPFRemoteRows] '#Documents'
+		,'SELECT srd.stu_award_year_token, srd.doc_token, doc_status_desc, status_effective_dt
+			FROM [PFaids].[dbo].[student_required_documents] srd
+			INNER JOIN [PFaids].[dbo].[docs] d ON d.doc_token = srd.doc_token
+			INNER JOIN [PFaids].[dbo].[doc_status_code] dsc ON dsc.doc_required_status_code = srd.doc_status
+			WHERE srd.stu_award_year_token IN ({keys})'
+
+	--Award years are matched with IN, like PS_selPFChecklist, so an award year with several POE's isn't repeated
+	SELECT a.AppID
+		,srd.doc_token [Code]
+		,srd.doc_status_desc [Status]
+		,FORMAT(srd.status_effective_dt, 'yyyy-MM-dd') [Date]
+	FROM #Apps a
+	INNER JOIN #AwardYears say
+		ON say.student_token = a.student_token
+	INNER JOIN #Documents srd
+		ON say.stu_award_year_token = srd.stu_award_year_token
+	WHERE say.award_year_token IN (
+			SELECT p.award_year
+			FROM #POEs p
+			WHERE p.aid = a.aid
+			)
+	ORDER BY a.AppID
+END
+GO
+
@@ -0,0 +1,226 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Set-based combination of PS_selAcademicGuid and PS_selProfile for many applications at once.
+--				@Apps is a JSON array like [{"aid": "guid", "PCID": "P000000001", "AcademicYear": "2026", "AcademicTerm": "FALL", "AcademicSession": "01",
+--				"Program": "UNDER", "Degree": "BA", "Curriculum": "ENG", "AcademicGuid": null}].
+--				Returns one row per application with the Academic GUID check (ErrorFlag, ErrorMessage, AcademicGuid),
+--				ProfileFound, and the same profile columns as PS_selProfile.
+--				Requires PowerCampus 9.2.1 or later.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_selProfileBulk] @Apps NVARCHAR(max)
+	,@EmailType NVARCHAR(10)
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	--Error check
+	IF (
+			@EmailType IS NOT NULL
+			AND NOT EXISTS (
+				SELECT *
+				FROM CODE_EMAILTYPE
+				WHERE CODE_VALUE_KEY = @EmailType
+				)
+			)
+	BEGIN
+		RAISERROR (
+				'@EmailType ''%s'' not found in CODE_EMAILTYPE.'
+				,11
+				,1
+				,@EmailType
+				)
+
+		RETURN
+	END
+
+	CREATE TABLE #Apps (
+		aid NVARCHAR(50) PRIMARY KEY
+		,PCID NVARCHAR(10)
+		,[Year] NVARCHAR(4)
+		,Term NVARCHAR(10)
+		,[Session] NVARCHAR(10)
+		,Program NVARCHAR(6)
+		,Degree NVARCHAR(6)
+		,Curriculum NVARCHAR(6)
+		,AcademicGuid UNIQUEIDENTIFIER
+		,ErrorFlag BIT NOT NULL DEFAULT 0
+		,ErrorMessage NVARCHAR(max)
+		,Credits NUMERIC(6, 2)
+		)
+
+	INSERT INTO #Apps (
+		aid
+		,PCID
+		,[Year]
+		,Term
+		,[Session]
+		,Program
+		,Degree
+		,Curriculum
+		,AcademicGuid
+		)
+	SELECT aid
+		,PCID
+		,AcademicYear
+		,AcademicTerm
+		,AcademicSession
+		,Program
+		,Degree
+		,Curriculum
+		,AcademicGuid
+	FROM OPENJSON(@Apps) WITH (
+			aid NVARCHAR(50)
+			,PCID NVARCHAR(10)
+			,AcademicYear NVARCHAR(4)
+			,AcademicTerm NVARCHAR(10)
+			,AcademicSession NVARCHAR(10)
+			,Program NVARCHAR(6)
+			,Degree NVARCHAR(6)
+			,Curriculum NVARCHAR(6)
+			,AcademicGuid UNIQUEIDENTIFIER
+			)
+
+	--Verify that YTSPDC match existing AcademicGuid's. PCID mismatches take precedence, same as PS_selAcademicGuid.
+	UPDATE a
+	SET ErrorFlag = 1
+		,ErrorMessage = CASE
+			WHEN ac.PEOPLE_CODE_ID <> a.PCID
+				THEN 'The Application in PowerCampus has a different PEOPLE_CODE_ID than the Slate application.<br />
+                Expected: ' + a.PCID + '<br />
+                Found: ' + ac.PEOPLE_CODE_ID
+			ELSE 'The Application in PowerCampus has a different YTS + PDC than the Slate application.<br />
+				Expected: ' + a.[Year] + '/' + a.Term + '/' + a.[Session] + '/' + a.Program + '/' + a.Degree + '/' + a.Curriculum + '<br />
+				Found: ' + ac.ACADEMIC_YEAR + '/' + ac.ACADEMIC_TERM + '/' + ac.ACADEMIC_SESSION + '/' + ac.PROGRAM + '/' + ac.DEGREE + '/' + ac.CURRICULUM
+			END
+	FROM #Apps a
+	INNER JOIN [ACADEMIC] ac
+		ON ac.[Guid] = a.AcademicGuid
+	WHERE ac.ACADEMIC_YEAR <> a.[Year]
+		OR ac.ACADEMIC_TERM <> a.Term
+		OR ac.ACADEMIC_SESSION <> a.[Session]
+		OR ac.PROGRAM <> a.Program
+		OR ac.DEGREE <> a.Degree
+		OR ac.CURRICULUM <> a.Curriculum
+		OR ac.PEOPLE_CODE_ID <> a.PCID
+
+	--Search for AcademicGuid if NULL
+	UPDATE a
+	SET AcademicGuid = ac.[Guid]
+	FROM #Apps a
+	INNER JOIN ACADEMIC ac
+		ON ac.PEOPLE_CODE_ID = a.PCID
+			AND ac.ACADEMIC_YEAR = a.[Year]
+			AND ac.ACADEMIC_TERM = a.Term
+			AND ac.ACADEMIC_SESSION = a.[Session]
+			AND ac.PROGRAM = a.Program
+			AND ac.DEGREE = a.Degree
+			AND ac.CURRICULUM = a.Curriculum
+	WHERE a.AcademicGuid IS NULL
+
+	--Select credits from rollup
+	UPDATE a
+	SET Credits = ac.CREDITS
+	FROM #Apps a
+	INNER JOIN ACADEMIC ac
+		ON ac.PEOPLE_CODE_ID = a.PCID
+			AND ac.ACADEMIC_YEAR = a.[Year]
+			AND ac.ACADEMIC_TERM = a.Term
+			AND ac.ACADEMIC_SESSION = ''
+			AND ac.PROGRAM = a.Program
+			AND ac.DEGREE = a.Degree
+			AND ac.CURRICULUM = a.Curriculum
+	WHERE a.ErrorFlag = 0
+
+	--See PS_selProfile for notes on Registered
+	SELECT a.aid
+		,a.ErrorFlag
+		,a.ErrorMessage
+		,a.AcademicGuid
+		,CASE
+			WHEN ac.PEOPLE_CODE_ID IS NULL
+				THEN 0
+			ELSE 1
+			END AS [ProfileFound]
+		,CASE
+			WHEN a.Credits > 0
+				THEN 'Y'
+			WHEN ac.PROGRAM = 'CERT'
+				AND EXISTS (
+					SELECT TD.PEOPLE_ID
+					FROM TRANSCRIPTDETAIL TD
+					INNER JOIN ACADEMIC ac2
+						ON ac2.PEOPLE_CODE_ID = TD.PEOPLE_CODE_ID
+							AND ac2.ACADEMIC_YEAR = TD.ACADEMIC_YEAR
+							AND ac2.ACADEMIC_TERM = TD.ACADEMIC_TERM
+							AND ac2.ACADEMIC_SESSION = TD.ACADEMIC_SESSION
+							AND ac2.PROGRAM = a.Program
+							AND ac2.DEGREE = a.Degree
+							AND ac2.CURRICULUM = a.Curriculum
+							AND ac2.TRANSCRIPT_SEQ = TD.TRANSCRIPT_SEQ
+							AND ac2.APPLICATION_FLAG = 'Y'
+					WHERE TD.PEOPLE_CODE_ID = a.PCID
+						AND TD.ACADEMIC_YEAR = a.[Year]
+						AND TD.ACADEMIC_TERM = a.Term
+						AND TD.ACADEMIC_SESSION = a.[Session]
+						AND TD.ADD_DROP_WAIT = 'A'
+					)
+				THEN 'Y'
+			ELSE 'N'
+			END AS [Registered]
+		,CAST(COALESCE(ac.PREREG_VAL_DATE, ac.REG_VAL_DATE) AS DATE) AS [REG_VAL_DATE]
+		,cast(a.Credits AS VARCHAR(6)) AS [CREDITS]
+		,ac.[COLLEGE_ATTEND]
+		,(
+			SELECT REQUIRE_SEPDATE
+			FROM CODE_ENROLLMENT
+			WHERE CODE_VALUE_KEY = ac.ENROLL_SEPARATION
+			) AS [Withdrawn]
+		,oE.Email AS [CampusEmail]
+		,(
+			SELECT NonQualifiedUserName
+			FROM PersonUser
+			WHERE PersonId = dbo.fnGetPersonId(ac.ADVISOR)
+			) AS [AdvisorUsername]
+		,(
+			SELECT NonQualifiedUserName
+			FROM PersonUser
+			WHERE PersonId = dbo.fnGetPersonId(ac.PEOPLE_CODE_ID)
+			) AS [Username]
+		,NULL [custom_1]
+		,NULL [custom_2]
+		,NULL [custom_3]
+		,NULL [custom_4]
+		,NULL [custom_5]
+	FROM #Apps a
+	LEFT JOIN ACADEMIC ac
+		ON a.ErrorFlag = 0
+			AND ac.PEOPLE_CODE_ID = a.PCID
+			AND ac.ACADEMIC_YEAR = a.[Year]
+			AND ac.ACADEMIC_TERM = a.Term
+			AND ac.ACADEMIC_SESSION = a.[Session]
+			AND ac.PROGRAM = a.Program
+			AND ac.DEGREE = a.Degree
+			AND ac.CURRICULUM = a.Curriculum
+			AND ac.APPLICATION_FLAG = 'Y' --Ought to be an application, or there's a problem somewhere.
+	OUTER APPLY (
+		SELECT TOP 1 Email
+		FROM EmailAddress E
+		WHERE E.PeopleOrgCodeId = ac.PEOPLE_CODE_ID
+			AND E.EmailType = @EmailType
+			AND E.IsActive = 1
+		ORDER BY E.REVISION_DATE DESC
+			,REVISION_TIME DESC
+		) oE
+END
+GO
+
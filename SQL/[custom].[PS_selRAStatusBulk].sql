@@ -0,0 +1,37 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Set-based version of PS_selRAStatus for many applications at once.
+--				@ApplicationNumbers is a JSON array of ApplicationNumber GUID's, like ["guid1", "guid2"].
+--				Applications not found in RecruiterApplication are not returned.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_selRAStatusBulk] @ApplicationNumbers NVARCHAR(max)
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	SELECT ra.ApplicationNumber
+		,PEOPLE_CODE_ID
+		,apl.PersonId AS PersonId
+		,ra.[Status] AS 'ra_status'
+		,ra.[ErrorMessage] AS 'ra_errormessage'
+		,apl.[Status] AS 'apl_status'
+	FROM OPENJSON(@ApplicationNumbers) j
+	INNER JOIN RecruiterApplication ra
+		ON ra.ApplicationNumber = TRY_CAST(j.[value] AS UNIQUEIDENTIFIER)
+	LEFT JOIN [Application] apl
+		ON apl.ApplicationId = ra.ApplicationId
+	LEFT JOIN PEOPLE p
+		ON p.PersonId = apl.PersonId
+END
+GO
+
@@ -0,0 +1,205 @@
+USE [Campus6]
+GO
+
+SET ANSI_NULLS ON
+GO
+
+SET QUOTED_IDENTIFIER ON
+GO
+
+-- =============================================
+-- Author:		Wyatt Best
+-- Create date: 2026-10-18
+-- Description:	Set-based version of PS_updProgramOfStudy for many PDC combinations at once.
+--				@Programs is a JSON array like [{"Program": "UNDER", "Degree": "BA", "Curriculum": "ENG"}].
+--				All combinations are validated before anything is inserted. The first invalid combination raises the same error as PS_updProgramOfStudy.
+--				If @DegReqMinYear is not null, new PDC combinations will be valided against DEGREQ.
+-- =============================================
+CREATE PROCEDURE [custom].[PS_updProgramOfStudyBulk] @Programs NVARCHAR(max)
+	,@DegReqMinYear NVARCHAR(4) = NULL
+	,@AppFormSettingId INT
+AS
+BEGIN
+	SET NOCOUNT ON;
+
+	DECLARE @Program NVARCHAR(6)
+		,@Degree NVARCHAR(6)
+		,@Curriculum NVARCHAR(6)
+
+	CREATE TABLE #Programs (
+		Program NVARCHAR(6)
+		,Degree NVARCHAR(6)
+		,Curriculum NVARCHAR(6)
+		,ProgramId INT
+		,DegreeId INT
+		,CurriculumId INT
+		,ProgramOfStudyId INT
+		)
+
+	INSERT INTO #Programs
+	SELECT DISTINCT j.Program
+		,j.Degree
+		,j.Curriculum
+		,cp.ProgramId
+		,cd.DegreeId
+		,cc.CurriculumId
+		,NULL
+	FROM OPENJSON(@Programs) WITH (
+			Program NVARCHAR(6)
+			,Degree NVARCHAR(6)
+			,Curriculum NVARCHAR(6)
+			) j
+	LEFT JOIN CODE_PROGRAM cp
+		ON cp.CODE_VALUE_KEY = j.Program
+	LEFT JOIN CODE_DEGREE cd
+		ON cd.CODE_VALUE_KEY = j.Degree
+	LEFT JOIN CODE_CURRICULUM cc
+		ON cc.CODE_VALUE_KEY = j.Curriculum
+
+	--Error checks
+	SELECT TOP 1 @Program = Program
+	FROM #Programs
+	WHERE ProgramId IS NULL
+
+	IF @Program IS NOT NULL
+	BEGIN
+		RAISERROR (
+				'@Program ''%s'' not found in CODE_PROGRAM.'
+				,11
+				,1
+				,@Program
+				)
+
+		RETURN
+	END
+
+	SELECT TOP 1 @Degree = Degree
+	FROM #Programs
+	WHERE DegreeId IS NULL
+
+	IF @Degree IS NOT NULL
+	BEGIN
+		RAISERROR (
+				'@Degree ''%s'' not found in CODE_DEGREE.'
+				,11
+				,1
+				,@Degree
+				)
+
+		RETURN
+	END
+
+	SELECT TOP 1 @Curriculum = Curriculum
+	FROM #Programs
+	WHERE CurriculumId IS NULL
+
+	IF @Curriculum IS NOT NULL
+	BEGIN
+		RAISERROR (
+				'@Curriculum ''%s'' not found in CODE_CURRICULUM.'
+				,11
+				,1
+				,@Curriculum
+				)
+
+		RETURN
+	END
+
+	IF @DegReqMinYear IS NOT NULL
+		AND NOT EXISTS (
+			SELECT *
+			FROM ACADEMICCALENDAR
+			WHERE ACADEMIC_YEAR = @DegReqMinYear
+			)
+	BEGIN
+		RAISERROR (
+				'@DegReqMinYear ''%s'' not found in ACADEMICCALENDAR.'
+				,11
+				,1
+				,@DegReqMinYear
+				)
+
+		RETURN
+	END
+
+	--Get existing ProgramOfStudyId's
+	UPDATE p
+	SET ProgramOfStudyId = pos.ProgramOfStudyId
+	FROM #Programs p
+	INNER JOIN ProgramOfStudy pos
+		ON pos.Program = p.ProgramId
+			AND pos.Degree = p.DegreeId
+			AND pos.Curriculum = p.CurriculumId
+
+	--Optionally check new combinations against DEGREQ
+	IF @DegReqMinYear IS NOT NULL
+	BEGIN
+		SELECT TOP 1 @Program = Program
+			,@Degree = Degree
+			,@Curriculum = Curriculum
+		FROM #Programs p
+		WHERE ProgramOfStudyId IS NULL
+			AND NOT EXISTS (
+				SELECT *
+				FROM DEGREQ
+				WHERE MATRIC_YEAR = @DegReqMinYear
+					AND PROGRAM = p.Program
+					AND DEGREE = p.Degree
+					AND CURRICULUM = p.Curriculum
+				)
+
+		IF @Program IS NOT NULL
+		BEGIN
+			RAISERROR (
+					'Combination ''%s/%s/%s'' not found in DEGREQ for year ''%s'' or later.'
+					,11
+					,1
+					,@Program
+					,@Degree
+					,@Curriculum
+					,@DegReqMinYear
+					)
+
+			RETURN
+		END
+	END
+
+	--Insert new ProgramOfStudy rows
+	INSERT INTO ProgramOfStudy (
+		Program
+		,Degree
+		,Curriculum
+		)
+	SELECT ProgramId
+		,DegreeId
+		,CurriculumId
+	FROM #Programs
+	WHERE ProgramOfStudyId IS NULL
+
+	--Get the newly-inserted ProgramOfStudyId's
+	UPDATE p
+	SET ProgramOfStudyId = pos.ProgramOfStudyId
+	FROM #Programs p
+	INNER JOIN ProgramOfStudy pos
+		ON pos.Program = p.ProgramId
+			AND pos.Degree = p.DegreeId
+			AND pos.Curriculum = p.CurriculumId
+	WHERE p.ProgramOfStudyId IS NULL
+
+	--Insert missing ApplicationProgramSetting rows
+	INSERT INTO ApplicationProgramSetting (
+		ApplicationFormSettingId
+		,ProgramOfStudyId
+		)
+	SELECT @AppFormSettingId
+		,ProgramOfStudyId
+	FROM #Programs p
+	WHERE NOT EXISTS (
+			SELECT *
+			FROM ApplicationProgramSetting aps
+			WHERE aps.ApplicationFormSettingId = @AppFormSettingId
+				AND aps.ProgramOfStudyId = p.ProgramOfStudyId
+			)
+END
+GO
+
@@ -0,0 +1,830 @@
+"""Micro-benchmarks for PowerSlate's per-app processing, run against synthetic payloads.
+
+Nothing here touches Slate or PowerCampus; the http benchmark runs against local stand-ins for both.
+Example: py.exe .\\benchmark.py format
+"""
+
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import ps_models
+from ps_format import (
+    Field_schema,
+    format_blank_to_null,
+    format_app_generic,
+    format_app_api,
+    format_app_sql,
+)
+
+CFG_FIELDS = {
+    "fields_string": ["reg_date", "credits", "error_message"],
+    "fields_bool": ["error_flag", "readmit", "registered", "withdrawn"],
+    "fields_int": [],
+}
+PC_CONFIG = SimpleNamespace(notes=[], user_defined_fields=[])
+DEFAULTS = SimpleNamespace(address_country=None, phone_country="US", phone_type=1)
+
+
+def synthetic_app(i, education=3, tests=2):
+    """Return an app shaped like the Slate query output, with nested arrays."""
+    app = {}
+    for k, v in ps_models.fields.items():
+        if v["type"] == int:
+            app[k] = "1"
+        elif v["type"] == bool:
+            app[k] = "0"
+        elif v["supply_null"]:
+            app[k] = ""
+        else:
+            app[k] = "x"
+    app.pop("Campus", None)
+    app.pop("HomeLanguage", None)
+    app.update(
+        {
+            "aid": str(uuid.UUID(int=i + 1)),
+            "pid": str(uuid.UUID(int=10**9 + i)),
+            "Program": "UNDER",
+            "Degree": "BA",
+            "Curriculum": "ENG",
+            "YearTerm": "2026/FALL/01",
+            "Gender": 0,
+            "PrimaryCitizenship": None,
+            "SecondaryCitizenship": None,
+            "CollegeAttendStatus": None,
+            "Visa": None,
+            "MaritalStatus": None,
+            "Religion": None,
+            "PrimaryLanguage": None,
+            "Address1Line1": "1 Main St",
+            "Address1City": "Albany",
+            "Phone1Number": "(518) 555-0100",
+            "compare_registered": "0",
+            "compare_credits": "",
+            "Education": [
+                {"GUID": str(uuid.uuid4()), "OrgIdentifier": str(j), "GPA": ""}
+                for j in range(education)
+            ],
+            "TestScoresNumeric": [
+                {"TestType": "SAT", "TestDate": "2025-01-01", "Score1": str(600 + j)}
+                for j in range(tests)
+            ],
+        }
+    )
+    return app
+
+
+def synthetic_mapping():
+    yts = {"2026/FALL/01": None}
+    return {
+        "AcademicLevel": {"UNDER": "UNDER"},
+        "AcademicProgram": {
+            "PCDegreeCodeValue": {"BA/ENG": "BA"},
+            "PCCurriculumCodeValue": {"BA/ENG": "ENG"},
+        },
+        "AcademicTerm": {
+            "PCYearCodeValue": dict.fromkeys(yts, "2026"),
+            "PCTermCodeValue": dict.fromkeys(yts, "FALL"),
+            "PCSessionCodeValue": dict.fromkeys(yts, "01"),
+        },
+    }
+
+
+def format_blank_to_null_deepcopy(x):
+    """The previous deepcopy-based format_blank_to_null, kept for comparison."""
+    ret = deepcopy(x)
+    if isinstance(x, dict):
+        for k, v in ret.items():
+            ret[k] = format_blank_to_null_deepcopy(v)
+    if isinstance(x, list):
+        for k, v in enumerate(ret):
+            ret[k] = format_blank_to_null_deepcopy(v)
+    if x == "":
+        ret = None
+    return ret
+
+
+def find_duplicate_apps_nested(apps):
+    """The previous nested-loop duplicate check from main_sync, kept for comparison."""
+    duplicates = []
+    for k, v in apps.items():
+        duplicates.extend(
+            [
+                kk
+                for kk, vv in apps.items()
+                if vv["pid"] == v["pid"]
+                and k != kk
+                and vv["Program"] == v["Program"]
+                and vv["Degree"] == v["Degree"]
+                and vv["Curriculum"] == v["Curriculum"]
+                and vv["YearTerm"] == v["YearTerm"]
+            ]
+        )
+    return duplicates
+
+
+def timed(label, n, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.3f} s total {elapsed / n * 1000000:10.1f} us/app")
+    return result
+
+
+def bench_format(n=10000):
+    """Per-app cost of format_app_generic, format_app_api, and format_app_sql."""
+    apps = [synthetic_app(i) for i in range(n)]
+    mapping = synthetic_mapping()
+
+    schema = timed(
+        "Field_schema (once per run)", n, lambda: Field_schema(CFG_FIELDS, PC_CONFIG)
+    )
+    apps = timed(
+        "format_app_generic", n, lambda: [format_app_generic(a, schema) for a in apps]
+    )
+    timed(
+        "format_app_api",
+        n,
+        lambda: [format_app_api(a, schema, DEFAULTS, None) for a in apps],
+    )
+    timed(
+        "format_app_sql", n, lambda: [format_app_sql(a, schema, mapping) for a in apps]
+    )
+
+
+def bench_blank_to_null(n=2000):
+    """Time and allocations of format_blank_to_null on apps with large nested arrays."""
+    apps = [synthetic_app(i, education=10, tests=8) for i in range(n)]
+    for app in apps:
+        app["Scholarships"] = [
+            {"YearTerm": "2026/FALL", "Scholarship": "S" + str(j), "Notes": ""}
+            for j in range(5)
+        ]
+
+    for label, func in (
+        ("deepcopy (previous)", format_blank_to_null_deepcopy),
+        ("single pass", format_blank_to_null),
+    ):
+        timed(label, n, lambda: [func(a) for a in apps])
+
+        # Peak memory allocated while normalizing one app, including its output
+        transient = 0
+        tracemalloc.start()
+        for app in apps:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = func(app)
+            transient = max(transient, tracemalloc.get_traced_memory()[1] - before)
+            del result
+        tracemalloc.stop()
+        print(f"{'':<40} {transient / 1024:8.1f} KB peak allocated for one app")
+
+    assert [format_blank_to_null(a) for a in apps[:100]] == [
+        format_blank_to_null_deepcopy(a) for a in apps[:100]
+    ]
+
+
+def bench_duplicates(sizes=(1000, 2000, 4000, 8000, 16000, 64000)):
+    """Scaling of duplicate application detection. The nested loop is skipped above 8000 apps."""
+    import ps_core
+
+    schema = Field_schema(CFG_FIELDS, PC_CONFIG)
+    base = [format_app_generic(synthetic_app(i), schema) for i in range(max(sizes))]
+
+    for n in sizes:
+        # Every tenth person has two applications for the same YTS + PDC
+        apps = {a["aid"]: a for a in base[:n]}
+        for a in base[: n // 10]:
+            apps["dup-" + a["aid"]] = a | {"aid": "dup-" + a["aid"]}
+
+        found = timed(
+            f"find_duplicate_apps, {len(apps)} apps",
+            len(apps),
+            lambda: ps_core.find_duplicate_apps(apps),
+        )
+        if n <= 8000:
+            previous = timed(
+                f"nested loop (previous), {len(apps)} apps",
+                len(apps),
+                lambda: find_duplicate_apps_nested(apps),
+            )
+            assert set(found) == set(previous)
+
+
+def synthetic_fa_checklist(app, app_pc, docs=3):
+    """Stand-in for pf_get_fachecklist(), which needs PowerFAIDS."""
+    return [
+        {
+            "AppID": app["aid"],
+            "Code": app_pc["ACADEMIC_YEAR"] + str(j),
+            "Status": "Missing",
+            "Date": "2026-01-01",
+        }
+        for j in range(docs)
+    ]
+
+
+def bench_fa_checklist(n=10000):
+    """FA checklist collection: a second format_app_sql pass with list concatenation vs. reusing app_pc."""
+    schema = Field_schema(CFG_FIELDS, PC_CONFIG)
+    mapping = synthetic_mapping()
+    apps = [format_app_generic(synthetic_app(i), schema) for i in range(n)]
+
+    # Done once per app by the update phase either way
+    app_pcs = timed(
+        "format_app_sql (update phase)",
+        n,
+        lambda: [format_app_sql(a, schema, mapping) for a in apps],
+    )
+
+    def previous():
+        slate_upload_list = []
+        for app in apps:
+            app_pc = format_app_sql(app, schema, mapping)
+            slate_upload_list = slate_upload_list + synthetic_fa_checklist(app, app_pc)
+        return slate_upload_list
+
+    def current():
+        fa_checklists = []
+        for app, app_pc in zip(apps, app_pcs):
+            fa_checklists.extend(synthetic_fa_checklist(app, app_pc))
+        return fa_checklists
+
+    found = timed("reformat + concatenate (previous)", n, previous)
+    assert timed("reuse app_pc + extend", n, current) == found
+
+
+STUB_MAPPING = """<?xml version="1.0" encoding="utf-8"?>
+<root>
+<AcademicLevel NumberOfPowerCampusFieldsMapped="1"><row RCCodeValue="UNDER" PCCodeValue="UNDER"/></AcademicLevel>
+<AcademicProgram NumberOfPowerCampusFieldsMapped="2" PCFirstField="Degree" PCSecondField="Curriculum"><row RCCodeValue="BA/ENG" PCDegreeCodeValue="BA" PCCurriculumCodeValue="ENG"/></AcademicProgram>
+<AcademicTerm NumberOfPowerCampusFieldsMapped="3" PCFirstField="Year" PCSecondField="Term" PCThirdField="Session"><row RCCodeValue="2026/FALL/01" PCYearCodeValue="2026" PCTermCodeValue="FALL" PCSessionCodeValue="01"/></AcademicTerm>
+<CitizenshipStatus NumberOfPowerCampusFieldsMapped="1"/><CollegeAttend NumberOfPowerCampusFieldsMapped="1"/><Visa NumberOfPowerCampusFieldsMapped="1"/>
+<MaritalStatus NumberOfPowerCampusFieldsMapped="1"/><Religion NumberOfPowerCampusFieldsMapped="1"/><Language NumberOfPowerCampusFieldsMapped="1"/><Campus NumberOfPowerCampusFieldsMapped="1"/>
+</root>"""
+
+
+class StubRow(dict):
+    """Stand-in for pyodbc.Row, with access by attribute or position."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self.values())[key]
+        return dict.__getitem__(self, key)
+
+
+def stub_db_rows(sql, params):
+    """Canned results for the procedures called while syncing one existing application."""
+    if "fnGetAbtSetting" in sql:
+        return [StubRow(version="9.2.3")]
+    if "PS_selRAStatusBulk" in sql:
+        aids = json.loads(params[0])
+    elif "PS_selRAStatus" in sql:
+        aids = [params[0]]
+    elif "PS_updDemographics" in sql:
+        return [StubRow(ErrorFlag=0, ErrorMessage=None)]
+    elif "PS_selAcademicCalendarBulk" in sql:
+        # Every Year/Term/Session exists
+        return [StubRow(yts) for yts in json.loads(params[0])]
+    elif "PS_selAcademicGuid" in sql:
+        return [StubRow(ErrorFlag=0, ErrorMessage=None, AcademicGuid=None)]
+    elif "PS_selProfile" in sql:
+        return [
+            StubRow(
+                Registered="N",
+                REG_VAL_DATE=None,
+                CREDITS="0",
+                COLLEGE_ATTEND="NEW",
+                Withdrawn="N",
+                CampusEmail=None,
+                AdvisorUsername=None,
+                Username=None,
+                custom_1=None,
+                custom_2=None,
+                custom_3=None,
+                custom_4=None,
+                custom_5=None,
+            )
+        ]
+    else:
+        return []
+
+    return [
+        StubRow(
+            ApplicationNumber=aid,
+            PEOPLE_CODE_ID="P" + aid[-9:],
+            PersonId=1,
+            ra_status=0,
+            ra_errormessage=None,
+            apl_status=2,
+        )
+        for aid in aids
+    ]
+
+
+class StubCursor:
+    def __init__(self, cnxn):
+        self.cnxn = cnxn
+        self.rows = []
+
+    def execute(self, sql, *params):
+        time.sleep(self.cnxn.latency)
+        self.cnxn.check()
+        self.rows = stub_db_rows(sql, params)
+        return self
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class StubConnection:
+    """Stand-in for a pyodbc connection that answers every statement after a fixed delay.
+
+    Set broken to make it fail like a connection the server dropped.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.broken = False
+
+    def check(self):
+        import ps_powercampus
+
+        if self.broken:
+            raise ps_powercampus.pyodbc.Error("08S01", "Communication link failure")
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def commit(self):
+        self.check()
+
+    def rollback(self):
+        self.check()
+
+    def close(self):
+        pass
+
+    def getinfo(self, info_type):
+        return "Campus6"
+
+
+class StubSlateHandler(BaseHTTPRequestHandler):
+    """Stand-in for Slate and the PowerCampus Web API that answers every request after a fixed delay."""
+
+    apps = {}  # {pid: [app, ...]}
+    actions = (
+        {}
+    )  # {aid: [Scheduled Action row, ...]} for requests with an aids parameter
+    action_urls = []  # Full URL of each Scheduled Actions request
+    retry_after = None  # Answer the next Scheduled Actions request with a 429 and this Retry-After
+    latency = 0.0
+    api_failures = 0  # api/version calls to fail, as if the API server restarted
+    lock = threading.Lock()
+    requests = 0
+    posted_bytes = 0
+
+    def count(self, posted_bytes=0):
+        with StubSlateHandler.lock:
+            StubSlateHandler.requests += 1
+            StubSlateHandler.posted_bytes += posted_bytes
+
+    def do_GET(self):
+        self.count()
+        time.sleep(self.latency)
+        url = urllib.parse.urlparse(self.path)
+        if url.path == "/api/version" and StubSlateHandler.api_failures > 0:
+            StubSlateHandler.api_failures -= 1
+            self.reply("Service Unavailable", 503)
+        elif url.path == "/api/version":
+            self.reply("9.2.3")
+        elif "aids" in urllib.parse.parse_qs(url.query):
+            with StubSlateHandler.lock:
+                StubSlateHandler.action_urls.append(
+                    "http://" + self.headers["Host"] + self.path
+                )
+                retry_after, StubSlateHandler.retry_after = (
+                    StubSlateHandler.retry_after,
+                    None,
+                )
+            if retry_after is not None:
+                self.reply("Too Many Requests", 429, {"Retry-After": str(retry_after)})
+                return
+            # Like the Slate query, apps without actions get one row with only the aid
+            rows = []
+            for aid in urllib.parse.parse_qs(url.query)["aids"][0].split(","):
+                rows.extend(self.actions.get(aid) or [{"aid": aid}])
+            self.reply(json.dumps({"row": rows}))
+        else:
+            pid = urllib.parse.parse_qs(url.query).get("pid", [None])[0]
+            self.reply(json.dumps({"row": self.apps.get(pid, [])}))
+
+    def do_POST(self):
+        self.count(len(self.rfile.read(int(self.headers.get("Content-Length", 0)))))
+        time.sleep(self.latency)
+        self.reply("ok")
+
+    def reply(self, body, status=200, headers=None):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def stub_config(directory, slate_url, **settings):
+    """Write a config that points every Slate and PowerCampus API URL at the stub server. Return its path.
+
+    settings -- top-level config values to override, like http_workers
+    """
+    with open("config_sample.json") as file:
+        config = json.load(file)
+
+    def set_urls(d):
+        for k, v in d.items():
+            if isinstance(v, dict):
+                set_urls(v)
+            elif k == "url":
+                d[k] = slate_url + "/slate"
+
+    set_urls(config)
+    config["powercampus"]["api"]["url"] = slate_url + "/"
+    config["powercampus"]["api"]["auth_method"] = "basic"
+    config["powercampus"]["mapping_file_location"] = os.path.join(
+        directory, "recruiterMapping.xml"
+    )
+    config["console_verbose"] = False
+    config["http_ip"] = "127.0.0.1"
+    config["http_port"] = 0
+    config.update(settings)
+
+    with open(config["powercampus"]["mapping_file_location"], "w") as file:
+        file.write(STUB_MAPPING)
+    path = os.path.join(directory, "config.json")
+    with open(path, "w") as file:
+        json.dump(config, file)
+
+    return path
+
+
+@contextlib.contextmanager
+def stub_backends(apps, slate_ms, db_ms, connect_ms=0):
+    """Serve apps from a stub Slate/PowerCampus API and answer SQL from stub connections. Yields the stub's base URL."""
+    import ps_powercampus
+
+    StubSlateHandler.apps = {}
+    for app in apps:
+        StubSlateHandler.apps.setdefault(app["pid"], []).append(app)
+    StubSlateHandler.actions = {}
+    StubSlateHandler.action_urls = []
+    StubSlateHandler.retry_after = None
+    StubSlateHandler.latency = slate_ms / 1000
+    StubSlateHandler.api_failures = 0
+
+    def connect(database_string):
+        time.sleep(connect_ms / 1000)
+        return StubConnection(db_ms / 1000)
+
+    ps_powercampus.pyodbc.connect = connect
+
+    slate = ThreadingHTTPServer(("127.0.0.1", 0), StubSlateHandler)
+    threading.Thread(target=slate.serve_forever, daemon=True).start()
+    try:
+        yield "http://127.0.0.1:" + str(slate.server_address[1])
+    finally:
+        slate.shutdown()
+        slate.server_close()
+
+
+@contextlib.contextmanager
+def sync_http_server(config_path):
+    """Run sync_http with a config on a background thread. Yields the server's base URL and the server."""
+    import ps_core
+    import sync_http
+
+    class QuietHandler(sync_http.HTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    config = ps_core.init(
+        config_path,
+        sync_http.concurrent_syncs(ps_core.read_config(config_path)),
+    )
+    httpd = sync_http.make_server(config, QuietHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield "http://127.0.0.1:" + str(httpd.server_address[1]) + "/", httpd
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        ps_core.de_init()
+
+
+def http_get(url):
+    """Return the latency and body of a GET request."""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as r:
+        body = r.read().decode("utf-8")
+    return time.perf_counter() - start, body
+
+
+def http_burst(urls):
+    """GET every URL at once. Return a list of (latency, body)."""
+    with ThreadPoolExecutor(len(urls)) as executor:
+        return list(executor.map(http_get, urls))
+
+
+def http_load(config_path, pids):
+    """Start sync_http with a config, request every pid in pids at once, and return the latencies and the server."""
+    with sync_http_server(config_path) as (base_url, httpd):
+        results = http_burst([base_url + "?pid=" + pid for pid in pids])
+
+    for latency, body in results:
+        assert "Sync completed" in body, body
+    return [latency for (latency, body) in results], httpd
+
+
+def latency_summary(latencies):
+    p95 = statistics.quantiles(latencies, n=20)[18]
+    return (
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms"
+    )
+
+
+def bench_http(n=16, workers=(1, 4, 8), slate_ms=20, db_ms=2):
+    """p50/p95 latency of n simultaneous sync_http requests for different pids, against stub Slate and database backends."""
+    apps = [synthetic_app(i, education=0, tests=0) for i in range(n)]
+
+    with stub_backends(apps, slate_ms, db_ms) as slate_url:
+        with tempfile.TemporaryDirectory() as directory:
+            for w in workers:
+                config_path = stub_config(
+                    directory, slate_url, http_workers=w, http_result_ttl=0
+                )
+                start = time.perf_counter()
+                latencies, httpd = http_load(config_path, [a["pid"] for a in apps])
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{w} workers, {n} concurrent pids: {latency_summary(latencies)}  {n / elapsed:6.1f} syncs/s"
+                )
+
+
+def bench_http_coalesce(pids=4, clicks=8, slate_ms=20, db_ms=2):
+    """Syncs run for repeated sync_http requests (all clicks for every pid at once) with and without coalescing and the result cache."""
+    apps = [synthetic_app(i, education=0, tests=0) for i in range(pids)]
+    requests = [a["pid"] for a in apps] * clicks
+
+    with stub_backends(apps, slate_ms, db_ms) as slate_url:
+        with tempfile.TemporaryDirectory() as directory:
+            for label, coalesce, ttl in (
+                ("neither", False, 0),
+                ("coalesce", True, 0),
+                ("coalesce + 5 s cache", True, 5),
+            ):
+                config_path = stub_config(
+                    directory,
+                    slate_url,
+                    http_workers=8,
+                    http_coalesce=coalesce,
+                    http_result_ttl=ttl,
+                )
+                latencies, httpd = http_load(config_path, requests)
+                stats = httpd.coalescer
+                print(
+                    f"{label:<22} {stats.syncs:3} syncs for {stats.requests} requests, "
+                    f"{stats.coalesced:3} coalesced, {stats.cache_hits:3} cache hits  {latency_summary(latencies)}"
+                )
+
+
+def bench_http_async(n=32, job_workers=4, slate_ms=20, db_ms=2):
+    """A burst of n sync_http requests in async mode: response latency, and each job's queue depth, wait time, and run time."""
+    apps = [synthetic_app(i, education=0, tests=0) for i in range(n)]
+
+    with stub_backends(apps, slate_ms, db_ms) as slate_url:
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = stub_config(
+                directory,
+                slate_url,
+                http_workers=8,
+                http_result_ttl=0,
+                http_async=True,
+                http_job_workers=job_workers,
+            )
+            with sync_http_server(config_path) as (base_url, httpd):
+                results = http_burst([base_url + "?pid=" + a["pid"] for a in apps])
+
+                # Poll each job's status until it's done
+                jobs = []
+                for latency, body in results:
+                    job_id = body.split("?job=")[1].split('"')[0]
+                    while True:
+                        job = json.loads(
+                            http_get(base_url + "?job=" + job_id + "&format=json")[1]
+                        )
+                        if job["status"] == "done":
+                            break
+                        time.sleep(0.05)
+                    assert "Sync completed" in job["message"], job["message"]
+                    jobs.append(job)
+
+    print(f"{'Response':<10} {latency_summary([r[0] for r in results])}")
+    print(f"{'Wait':<10} {latency_summary([j['wait_time'] for j in jobs])}")
+    print(f"{'Run':<10} {latency_summary([j['run_time'] for j in jobs])}")
+    print(f"{'':<10} max queue depth {max(j['queue_depth'] for j in jobs)}")
+
+
+def bench_warm_start(rounds=20, slate_ms=20, db_ms=2, connect_ms=50):
+    """Startup time by step, then recovery cost: full de_init()/init() vs. sync_http's health check after a dropped SQL connection or a failed API session."""
+    import ps_core
+    import ps_powercampus
+    import sync_http
+
+    def break_database():
+        for cnxn in ps_powercampus.POOL.connections:
+            cnxn.broken = True
+
+    def break_api():
+        StubSlateHandler.api_failures = 1
+
+    with stub_backends([], slate_ms, db_ms, connect_ms) as slate_url:
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = stub_config(directory, slate_url)
+            ps_core.init(config_path)
+            health = sync_http.HealthMonitor()
+            print(health.summary().splitlines()[0])
+
+            # A full re-init replaces everything, whichever resource failed
+            reinit = []
+            for i in range(rounds):
+                start = time.perf_counter()
+                ps_core.de_init()
+                ps_core.init(config_path)
+                reinit.append(time.perf_counter() - start)
+            print(f"{'Re-init':<28} {latency_summary(reinit)}")
+
+            health.check()  # Leave an idle pooled connection, as after a first sync
+            for label, fail in (
+                ("healthy", lambda: None),
+                ("database", break_database),
+                ("api", break_api),
+            ):
+                check = []
+                for i in range(rounds):
+                    fail()
+                    start = time.perf_counter()
+                    recovered = health.check()
+                    check.append(time.perf_counter() - start)
+                    assert set(recovered) == ({label} - {"healthy"}), recovered
+                print(f"{'Health check, ' + label:<28} {latency_summary(check)}")
+            ps_core.de_init()
+
+
+def bench_single_pid(rounds=20, slate_ms=20, db_ms=2):
+    """End-to-end latency of main_sync(pid) for one person with two apps, vs. the same apps through the batch path of a scheduled sync."""
+    import ps_core
+    import ps_powercampus
+    import sync_http
+
+    apps = [synthetic_app(i, education=0, tests=0) for i in range(2)]
+    apps[1]["pid"] = apps[0]["pid"]
+    apps[1]["Curriculum"] = "MATH"
+    pid = apps[0]["pid"]
+
+    def batch_sync():
+        with ps_powercampus.pooled_connection():
+            for batch in ps_core.slate_get_apps(pid):
+                ps_core.sync_apps(batch)
+
+    with stub_backends(apps, slate_ms, db_ms) as slate_url:
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = stub_config(directory, slate_url)
+            with open(config_path) as file:
+                config = json.load(file)
+            config["powercampus"]["autoconfigure_mappings"]["enabled"] = True
+            config["powercampus"]["update_workers"] = 4
+            config["scheduled_actions"]["enabled"] = True
+            with open(config_path, "w") as file:
+                json.dump(config, file)
+
+            ps_core.init(config_path)
+            with ThreadPoolExecutor(1) as executor:
+                for label, func in (
+                    ("Batch path", batch_sync),
+                    ("main_sync(pid)", lambda: sync_http.sync_pid(pid)),
+                ):
+                    latencies = []
+                    StubSlateHandler.requests = 0
+                    StubSlateHandler.posted_bytes = 0
+                    for i in range(rounds):
+                        start = time.perf_counter()
+                        executor.submit(func).result()
+                        latencies.append(time.perf_counter() - start)
+                    print(
+                        f"{label:<15} {latency_summary(latencies)}  "
+                        f"{StubSlateHandler.requests / rounds:4.1f} Slate requests, "
+                        f"{StubSlateHandler.posted_bytes / rounds / 1024:5.1f} KB posted per sync"
+                    )
+            ps_core.de_init()
+
+
+def bench_scheduled_actions(n=2000, max_url_length=1000, retry_after=3600):
+    """Fetch canned Scheduled Actions for n apps from the stub Slate, and check the grouping, URL-length batching, and Retry-After cap."""
+    import ps_core
+
+    aids = [str(uuid.UUID(int=i)) for i in range(n)]
+    canned = {
+        aid: [
+            {"aid": aid, "action_id": "AD" + str(j), "item": "Item " + str(j)}
+            for j in range(i % 4)
+        ]
+        for (i, aid) in enumerate(aids)
+    }
+
+    with stub_backends([], 0, 0) as slate_url:
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = stub_config(directory, slate_url)
+            with open(config_path) as file:
+                config = json.load(file)
+            config["scheduled_actions"]["slate_get"]["max_url_length"] = max_url_length
+            with open(config_path, "w") as file:
+                json.dump(config, file)
+
+            ps_core.init(config_path)
+            StubSlateHandler.actions = canned
+            StubSlateHandler.retry_after = retry_after
+
+            # Record backoff delays instead of waiting them out
+            sleeps = []
+            real_time = ps_core.time
+            ps_core.time = SimpleNamespace(
+                sleep=sleeps.append,
+                perf_counter=time.perf_counter,
+            )
+            try:
+                start = time.perf_counter()
+                actions = ps_core.slate_get_actions(aids)
+                seconds = time.perf_counter() - start
+            finally:
+                ps_core.time = real_time
+                ps_core.de_init()
+
+    expected = {aid: rows for (aid, rows) in canned.items() if rows}
+    longest = max(len(url) for url in StubSlateHandler.action_urls)
+    print(
+        f"{n} apps in {len(StubSlateHandler.action_urls) - 1} requests + 1 retry, "
+        f"{seconds * 1000:.1f} ms; longest URL {longest} of {max_url_length}; "
+        f"Retry-After {retry_after} s waited {sleeps}"
+    )
+    assert actions == expected, "actions not grouped by aid as sent"
+    assert longest <= max_url_length, "a request URL is longer than max_url_length"
+    assert sleeps == [60], "Retry-After wasn't capped at 60 s"
+
+
+BENCHMARKS = {
+    "format": bench_format,
+    "blank_to_null": bench_blank_to_null,
+    "duplicates": bench_duplicates,
+    "fa_checklist": bench_fa_checklist,
+    "http": bench_http,
+    "http_coalesce": bench_http_coalesce,
+    "http_async": bench_http_async,
+    "warm_start": bench_warm_start,
+    "single_pid": bench_single_pid,
+    "scheduled_actions": bench_scheduled_actions,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print("== " + name + ": " + BENCHMARKS[name].__doc__)
+        BENCHMARKS[name]()
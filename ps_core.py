@@ -1,16 +1,69 @@
 import requests
+import gzip
+import io
+import itertools
 import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from copy import deepcopy
+from urllib.parse import quote_plus
 from ps_format import (
     format_app_generic,
     format_app_api,
     format_app_sql,
+    Field_schema,
     Edu_sync_result,
     Stop_from_Slate,
     Scholarship_from_Slate,
     Association_from_Slate,
 )
 import ps_powercampus
+import ps_state
+
+AUTOCONFIGURE_LOCK = threading.Lock()
+LEARN_ACTIONS_LOCK = threading.Lock()
+STARTUP_TIMES = {}  # {step: seconds} for the last init()
+LOCAL = (
+    threading.local()
+)  # Per-sync state, since sync_http runs several syncs at once; see current_record()
+
+# Settings that config files from earlier versions may not have, and the values to assume for them
+CONFIG_DEFAULTS = {
+    "powercampus": {
+        "validate_code_tables": {"enabled": False, "ttl": None},
+        "mapping_cache_file": None,
+        "update_workers": 1,
+        "transaction_per_app": False,
+        "bulk_profile": False,
+    },
+    "slate_query_apps": {"stream_chunk_size": None},
+    "slate_upload": {
+        "chunk_rows": None,
+        "chunk_bytes": None,
+        "gzip": False,
+        "max_in_flight": 4,
+        "retries": 3,
+        "timeout": 300,
+    },
+    "slate_upload_passive": {"diff": False, "force_full_refresh": False},
+    "scheduled_actions": {
+        "slate_get": {"max_in_flight": 4, "max_url_length": 2000, "retries": 3}
+    },
+    "fa_checklist": {"bulk": False, "slate_post": {"chunk_rows": None}},
+    "fa_awards": {"bulk": False},
+    "incremental_sync": {"enabled": False, "full_sync_every": 24},
+    "state_file": None,
+    "http_workers": 1,
+    "http_coalesce": True,
+    "http_result_ttl": 5,
+    "http_async": False,
+    "http_job_workers": 4,
+    "http_max_queued_jobs": 100,
+    "http_health_interval": 300,
+}
 
 
 # The Settings class should replace the CONFIG global in all new code.
@@ -42,6 +95,8 @@ class Settings:
     def __init__(self, config):
         self.fa_awards = self.DictFlat(config["fa_awards"])
         self.fa_checklist = self.DictFlat(config["fa_checklist"])
+        self.incremental_sync = self.DictFlat(config["incremental_sync"])
+        self.slate_upload = self.DictFlat(config["slate_upload"])
         self.console_verbose = config["console_verbose"]
         self.defaults = self.DictFlat(config["defaults"])
         self.PowerCampus = self.PowerCampus(config["powercampus"])
@@ -81,24 +136,89 @@ class Settings:
             raise ValueError(self.Messages.error.api_token_format)
 
 
-def init(config_path):
-    """Reads config file to global CONFIG dict. Many frequently-used variables are copied to their own globals for convenince."""
+@contextmanager
+def startup_step(name):
+    """Record how long a step of init() takes in STARTUP_TIMES."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMES[name] = time.perf_counter() - start
+
+
+def apply_config_defaults(config, defaults):
+    """Fill in settings missing from config with their values from defaults, recursively."""
+    for k, v in defaults.items():
+        if k not in config:
+            config[k] = deepcopy(v)
+        elif isinstance(v, dict) and isinstance(config[k], dict):
+            apply_config_defaults(config[k], v)
+
+
+def read_config(config_path):
+    """Return the config file as a dict, with CONFIG_DEFAULTS for any settings it doesn't have."""
+    with open(config_path) as file:
+        config = json.loads(file.read())
+    apply_config_defaults(config, CONFIG_DEFAULTS)
+    return config
+
+
+def init(config_path, concurrent_syncs=1):
+    """Reads config file to global CONFIG dict. Many frequently-used variables are copied to their own globals for convenince.
+
+    Keyword arguments:
+    config_path -- path to the JSON config file
+    concurrent_syncs -- how many syncs may run at once, like sync_http's workers. Sizes the Slate session and SQL connection pool.
+    """
     global CONFIG
     global CONFIG_PATH
     global RM_MAPPING
+    global SCHEMA
     global SETTINGS  # New global for Settings class
+    global SLATE_SESSION
 
-    CONFIG_PATH = config_path
-    with open(CONFIG_PATH) as file:
-        CONFIG = json.loads(file.read())
-    SETTINGS = Settings(CONFIG)
+    STARTUP_TIMES.clear()
 
-    RM_MAPPING = ps_powercampus.get_recruiter_mapping(
-        SETTINGS.PowerCampus.mapping_file_location
-    )
+    with startup_step("config"):
+        CONFIG_PATH = config_path
+        CONFIG = read_config(CONFIG_PATH)
+        SETTINGS = Settings(CONFIG)
+        SCHEMA = Field_schema(CONFIG["slate_upload_active"], SETTINGS.PowerCampus)
+
+        # One keep-alive HTTP session for all Slate requests, shared by sync_http's worker threads
+        SLATE_SESSION = slate_session(
+            max(
+                SETTINGS.slate_upload.max_in_flight,
+                SETTINGS.ScheduledActions.slate_get.max_in_flight,
+            )
+            * concurrent_syncs
+        )
+
+    with startup_step("mapping"):
+        RM_MAPPING = ps_powercampus.get_recruiter_mapping_cached(
+            SETTINGS.PowerCampus.mapping_file_location,
+            SETTINGS.PowerCampus.mapping_cache_file,
+        )
 
     # Init PowerCampus API and SQL connections
-    ps_powercampus.init(SETTINGS.PowerCampus, SETTINGS.console_verbose)
+    with startup_step("powercampus"):
+        ps_powercampus.init(
+            SETTINGS.PowerCampus,
+            SETTINGS.console_verbose,
+            (SETTINGS.PowerCampus.update_workers or 1) * concurrent_syncs,
+        )
+
+    if SETTINGS.PowerCampus.bulk_profile and not ps_powercampus.PC_GUID_SUPPORT:
+        raise ValueError("bulk_profile requires PowerCampus 9.2.1 or later.")
+
+    # Local state file for incremental syncs and passive upload diffs
+    with startup_step("state"):
+        if CONFIG["state_file"] is not None:
+            ps_state.init(CONFIG["state_file"])
+        elif SETTINGS.incremental_sync.enabled:
+            raise ValueError("Incremental sync requires state_file to be set.")
+        elif CONFIG["slate_upload_passive"]["diff"]:
+            raise ValueError("slate_upload_passive.diff requires state_file to be set.")
 
     return CONFIG
 
@@ -106,6 +226,13 @@ def init(config_path):
 def de_init():
     """Release resources like open SQL connections."""
     ps_powercampus.de_init()
+    ps_state.de_init()
+    SLATE_SESSION.close()
+
+
+def current_record():
+    """Return the aid of the record the current thread's sync was working on, or None."""
+    return getattr(LOCAL, "current_record", None)
 
 
 def verbose_print(x):
@@ -120,53 +247,201 @@ def verbose_print(x):
                 print(x)
 
 
+def slate_request(session, method, url, retries=3, **kwargs):
+    """Send an HTTP request to Slate, retrying with exponential backoff on 429, 5xx, and connection errors.
+
+    Keyword arguments:
+    session -- requests.Session
+    method -- "GET", "POST", etc.
+    url -- str
+    retries -- number of retries after the first attempt
+    **kwargs -- passed through to session.request(). A file-like data is rewound before each attempt.
+
+    Returns a requests.Response after raise_for_status().
+    """
+    for attempt in range(retries + 1):
+        if hasattr(kwargs.get("data"), "seek"):
+            kwargs["data"].seek(0)
+        try:
+            r = session.request(method, url, **kwargs)
+            if r.status_code != 429 and r.status_code < 500:
+                break
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            r = None
+
+        if attempt < retries:
+            # Respect Retry-After (seconds) if Slate sends it, up to a minute
+            delay = 2**attempt
+            if r is not None and r.headers.get("Retry-After", "").isdigit():
+                delay = min(int(r.headers["Retry-After"]), 60)
+            time.sleep(delay)
+
+    r.raise_for_status()
+    return r
+
+
+def slate_session(pool_size):
+    """Return a keep-alive requests.Session with room for pool_size concurrent connections.
+
+    Slate endpoints use different credentials, so pass auth with each request.
+    """
+    http_session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+
+    return http_session
+
+
+def batch_by_url_length(url, param, values, max_length):
+    """Split values into comma-separated batches so that each GET URL stays within max_length characters.
+
+    Keyword arguments:
+    url -- base URL, which may already have a query string
+    param -- name of the query string parameter that will hold the batch
+    values -- iterable of strings
+    max_length -- int
+
+    Returns a list of lists.
+    """
+    base_length = len(requests.Request("GET", url, params={param: ""}).prepare().url)
+    separator_length = len(quote_plus(","))
+
+    batches = []
+    batch = []
+    length = base_length
+    for value in values:
+        value = str(value)
+        added = len(quote_plus(value)) + (separator_length if batch else 0)
+        if batch and length + added > max_length:
+            batches.append(batch)
+            batch = []
+            length = base_length
+            added = len(quote_plus(value))
+        batch.append(value)
+        length += added
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
 def slate_get_actions(apps_list):
     """Fetch 'Scheduled Actions' (Slate Checklist) for a list of applications.
 
     Keyword arguments:
-    apps_list -- list of ApplicationNumbers to fetch actions for
+    apps_list -- list of ApplicationNumbers to fetch actions for. Not modified.
 
     Returns:
-    action_list -- list of individual action as dicts
+    actions -- dict like {aid: [action, ...]} with each action as a dict. Apps without actions are omitted.
 
-    Uses its own HTTP session to reduce overhead and queries Slate with batches of 48 comma-separated ID's.
-    48 was chosen to avoid exceeding max GET request.
+    Queries Slate with batches of comma-separated ID's sized to stay under slate_get.max_url_length,
+    with up to slate_get.max_in_flight requests running at once over a shared HTTP session.
     """
+    cfg = SETTINGS.ScheduledActions.slate_get
+    batches = batch_by_url_length(cfg.url, "aids", apps_list, cfg.max_url_length)
+
+    def get_batch(batch):
+        r = slate_request(
+            SLATE_SESSION,
+            "GET",
+            cfg.url,
+            cfg.retries,
+            auth=(cfg.username, cfg.password),
+            params={"aids": ",".join(batch)},
+        )
+        return json.loads(r.text)["row"]
 
-    # Set up an HTTP session to use for multiple GET requests.
-    http_session = requests.Session()
-    http_session.auth = (
-        SETTINGS.ScheduledActions.slate_get.username,
-        SETTINGS.ScheduledActions.slate_get.password,
-    )
+    actions = {}
+    with ThreadPoolExecutor(cfg.max_in_flight) as executor:
+        # A single batch, as from a single-person sync, is sent from this thread
+        results = (executor.map if len(batches) > 1 else map)(get_batch, batches)
+        for rows in results:
+            # Group by app. Rows without an action_id are apps without actions.
+            for action in rows:
+                if "action_id" in action:
+                    actions.setdefault(action["aid"], []).append(action)
 
-    actions_list = []
+    return actions
 
-    while apps_list:
-        counter = 0
-        ql = []  # Queue list
-        qs = ""  # Queue string
-        al = []  # Temporary actions list
 
-        # Pop up to 48 app GUID's and append to queue list.
-        while apps_list and counter < 48:
-            ql.append(apps_list.pop())
-            counter += 1
+def chunk_upload_list(upload_list, max_rows=None, max_bytes=None):
+    """Split a list of dicts into chunks of at most max_rows rows and about max_bytes of JSON.
 
-        # Stuff them into a comma-separated string.
-        qs = ",".join(str(item) for item in ql)
+    A single row larger than max_bytes gets a chunk of its own. None disables a limit.
 
-        r = http_session.get(
-            SETTINGS.ScheduledActions.slate_get.url, params={"aids": qs}
-        )
-        r.raise_for_status()
-        al = json.loads(r.text)
-        actions_list.extend(al["row"])
-        # if len(al['row']) > 1: # Delete. I don't think an application could ever have zero actions.
+    Returns a list of lists.
+    """
+    chunks = []
+    chunk = []
+    size = 0
+    for row in upload_list:
+        # Rows are joined with ", " inside {"row": [...]}
+        row_size = len(json.dumps(row).encode("utf-8")) + 2 if max_bytes else 0
+        if chunk and (
+            (max_rows and len(chunk) >= max_rows)
+            or (max_bytes and size + row_size > max_bytes)
+        ):
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+        chunk.append(row)
+        size += row_size
+
+    if chunk:
+        chunks.append(chunk)
 
-    http_session.close()
+    return chunks
 
-    return actions_list
+
+def slate_post_rows(upload_list, config_dict):
+    """Upload a list of dicts to a Slate source format as {"row": [...]} JSON.
+
+    Keyword arguments:
+    upload_list -- list of flat dicts
+    config_dict -- dict with url, username, and password
+
+    The list is split according to slate_upload.chunk_rows and chunk_bytes, optionally gzip-encoded, and the
+    chunks are posted with up to slate_upload.max_in_flight requests at once over a shared HTTP session.
+    Each chunk is retried on its own by slate_request().
+    """
+    cfg = SETTINGS.slate_upload
+    chunks = chunk_upload_list(upload_list, cfg.chunk_rows, cfg.chunk_bytes)
+    if len(chunks) == 0:
+        return
+
+    def post_chunk(chunk):
+        start = time.perf_counter()
+
+        # Slate requires JSON to be convertable to XML
+        body = json.dumps({"row": chunk}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if cfg.gzip:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        slate_request(
+            SLATE_SESSION,
+            "POST",
+            config_dict["url"],
+            cfg.retries,
+            auth=(config_dict["username"], config_dict["password"]),
+            data=body,
+            headers=headers,
+            timeout=cfg.timeout,
+        )
+        return len(chunk), len(body), time.perf_counter() - start
+
+    with ThreadPoolExecutor(cfg.max_in_flight) as executor:
+        # A single chunk, as from a single-person sync, is sent from this thread
+        results = (executor.map if len(chunks) > 1 else map)(post_chunk, chunks)
+        for n, (rows, size, seconds) in enumerate(results):
+            verbose_print(
+                f"\tChunk {n + 1} of {len(chunks)}: {rows} rows, {size / 1024:.1f} KB in {seconds:.2f} s"
+            )
 
 
 def slate_post_generic(upload_list, config_dict):
@@ -175,45 +450,30 @@ def slate_post_generic(upload_list, config_dict):
     # Dedup list
     upload_list = [dict(t) for t in {tuple(sorted(d.items())) for d in upload_list}]
 
-    # Slate requires JSON to be convertable to XML
-    upload_dict = {"row": upload_list}
-
-    creds = (config_dict["username"], config_dict["password"])
-    r = requests.post(config_dict["url"], json=upload_dict, auth=creds)
-    r.raise_for_status()
+    slate_post_rows(upload_list, config_dict)
 
 
 def slate_post_apps_changed(apps, config_dict):
     # Check for changes between Slate and local state
     # Upload changed records back to Slate
 
-    # Build list of flat app dicts with only certain fields included
-    upload_list = []
-    fields = deepcopy(config_dict["fields_string"])
-    fields.extend(config_dict["fields_bool"])
-    fields.extend(config_dict["fields_int"])
-
-    if len(fields) == 1:
-        return
+    if len(SCHEMA.fields_compare) == 0:
+        return ""
 
+    # Build list of flat app dicts with only changed fields included
+    upload_list = []
     for app in apps.values():
-        CURRENT_RECORD = app["aid"]
-        upload_list.append(
-            {k: v for (k, v) in app.items() if k in fields and v != app["compare_" + k]}
-            | {"aid": app["aid"]}
-        )
-
-    # Apps with no changes will only contain {'aid': 'xxx'}
-    # Only retain items that have more than one field
-    upload_list[:] = [app for app in upload_list if len(app) > 1]
+        changed = {
+            k: app[k]
+            for (k, compare) in SCHEMA.fields_compare
+            if k in app and app[k] != app[compare]
+        }
+        # Apps with no changes aren't uploaded
+        if changed:
+            upload_list.append(changed | {"aid": app["aid"]})
 
     if len(upload_list) > 0:
-        # Slate requires JSON to be convertable to XML
-        upload_dict = {"row": upload_list}
-
-        creds = (config_dict["username"], config_dict["password"])
-        r = requests.post(config_dict["url"], json=upload_dict, auth=creds)
-        r.raise_for_status()
+        slate_post_rows(upload_list, config_dict)
 
     msg = (
         "\t"
@@ -226,46 +486,113 @@ def slate_post_apps_changed(apps, config_dict):
 
 
 def slate_post_fields(apps, config_dict):
+    """Upload passive fields to Slate.
+
+    With config_dict["diff"], only values that changed since the last successful upload are sent.
+    config_dict["force_full_refresh"] sends everything and rebuilds the last-sent snapshot.
+    """
     # Build list of flat app dicts with only certain fields included
-    upload_list = []
-    fields = ["aid"]
-    fields.extend(config_dict["fields"])
+    fields = ("aid",) + tuple(config_dict["fields"])
+    upload_list = [{k: app[k] for k in fields if k in app} for app in apps.values()]
 
-    for app in apps.values():
-        CURRENT_RECORD = app["aid"]
-        upload_list.append({k: v for (k, v) in app.items() if k in fields})
+    if config_dict["diff"]:
+        upload_list, hashes = ps_state.diff_sent_fields(
+            upload_list, config_dict["force_full_refresh"]
+        )
 
-    # Slate requires JSON to be convertable to XML
-    upload_dict = {"row": upload_list}
+    slate_post_rows(upload_list, config_dict)
 
-    creds = (config_dict["username"], config_dict["password"])
-    r = requests.post(config_dict["url"], json=upload_dict, auth=creds)
-    r.raise_for_status()
+    if config_dict["diff"]:
+        ps_state.save_sent_fields(hashes)
+
+    msg = (
+        "\t"
+        + str(len(upload_list))
+        + " of "
+        + str(len(apps))
+        + " apps had changed passive fields"
+    )
+    return msg
+
+
+def fa_checklist_tsv(rows, rewritten=None, buffer_size=65536):
+    """Yield a Financial Aid checklist import file as UTF-8 tab-separated text, in blocks of about buffer_size.
+
+    Values aren't quoted, as Slate's import expects. The format has no escape for tabs and line breaks inside a
+    value, so they become spaces, and (AppID, field) is appended to the rewritten list for each value changed.
+    """
+
+    def tsv_value(row, field):
+        value = row[field]
+        if value is None:
+            return ""
+        value = str(value)
+        clean = value.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+        if clean != value and rewritten is not None:
+            rewritten.append((row["AppID"], field))
+        return clean
+
+    buffer = io.StringIO()
+    buffer.write("AppID\tCode\tStatus\tDate")
+
+    for i in rows:
+        buffer.write("\n")
+        buffer.write(
+            "\t".join(tsv_value(i, k) for k in ("AppID", "Code", "Status", "Date"))
+        )
+        if buffer.tell() >= buffer_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
 
 
 def slate_post_fa_checklist(upload_list):
-    """Upload Financial Aid Checklist to Slate."""
+    """Upload Financial Aid Checklist to Slate.
 
-    if len(upload_list) > 0:
-        # Slate's Checklist Import (Financial Aid) requires tab-separated files because it's old and crusty, apparently.
-        tab = "\t"
-        slate_fa_string = "AppID" + tab + "Code" + tab + "Status" + tab + "Date"
-        for i in upload_list:
-            line = (
-                i["AppID"] + tab + str(i["Code"]) + tab + i["Status"] + tab + i["Date"]
+    upload_list -- any iterable of checklist dicts. It is read once, in separate imports of
+    fa_checklist.slate_post.chunk_rows rows if set. Nothing is posted if it's empty.
+
+    Each import is spooled to a temporary file so slate_request() can resend it on a retry.
+    """
+    # Slate's Checklist Import (Financial Aid) requires tab-separated files because it's old and crusty, apparently.
+    cfg = CONFIG["fa_checklist"]["slate_post"]
+    chunk_rows = cfg["chunk_rows"]
+    rows = iter(upload_list)
+    rewritten = []
+
+    while True:
+        chunk = itertools.islice(rows, chunk_rows)
+        first = next(chunk, None)
+        if first is None:
+            break
+
+        with tempfile.TemporaryFile() as file:
+            for block in fa_checklist_tsv(itertools.chain([first], chunk), rewritten):
+                file.write(block)
+
+            slate_request(
+                SLATE_SESSION,
+                "POST",
+                cfg["url"],
+                SETTINGS.slate_upload.retries,
+                auth=(cfg["username"], cfg["password"]),
+                data=file,
+                timeout=SETTINGS.slate_upload.timeout,
             )
-            slate_fa_string = slate_fa_string + "\n" + line
 
-        creds = (
-            CONFIG["fa_checklist"]["slate_post"]["username"],
-            CONFIG["fa_checklist"]["slate_post"]["password"],
-        )
-        r = requests.post(
-            CONFIG["fa_checklist"]["slate_post"]["url"],
-            data=slate_fa_string,
-            auth=creds,
+        if chunk_rows is None:
+            break
+
+    if rewritten:
+        verbose_print(
+            "Replaced tabs or line breaks with spaces in "
+            + str(len(rewritten))
+            + " Financial Aid checklist values: "
+            + ", ".join("AppID " + str(a) + " " + f for (a, f) in rewritten[:20])
+            + (", ..." if len(rewritten) > 20 else "")
         )
-        r.raise_for_status()
 
 
 def slate_post_education_changed(edu_list, config_dict):
@@ -291,144 +618,676 @@ def slate_post_education_changed(edu_list, config_dict):
     return msg
 
 
-def learn_actions(actions_list):
-    global CONFIG
-    action_ids = []
-    admissions_action_codes = SETTINGS.ScheduledActions.admissions_action_codes
+def slate_post_all(uploads, concurrent=False):
+    """Run Slate uploads one after another, or all at once.
+
+    Keyword arguments:
+    uploads -- list of (description, function, *args) tuples. Functions must not use the SQL connection, since they may run on other threads.
+    concurrent -- bool
+    """
+    if concurrent:
+        with ThreadPoolExecutor(len(uploads)) as executor:
+            futures = [executor.submit(func, *args) for (desc, func, *args) in uploads]
+
+    for n, (desc, func, *args) in enumerate(uploads):
+        verbose_print(desc)
+        result = futures[n].result() if concurrent else func(*args)
+        if result:
+            verbose_print(result)
 
-    for action_id in actions_list:
-        for k, v in action_id.items():
-            if k == "action_id":
-                action_ids.append(v)
-    learned_actions = [k for k in action_ids if k not in admissions_action_codes]
 
-    # Dedupe
-    learned_actions = list(set(learned_actions))
+def learn_actions(actions):
+    """Add new action_id's from Slate to admissions_action_codes in memory. save_config() writes them to the config file.
+
+    Keyword arguments:
+    actions -- dict of Scheduled Actions from slate_get_actions()
+
+    Returns the list of learned action_id's.
+    """
+    admissions_action_codes = SETTINGS.ScheduledActions.admissions_action_codes
+
+    action_ids = {
+        action["action_id"]
+        for app_actions in actions.values()
+        for action in app_actions
+    }
+    learned_actions = action_ids.difference(admissions_action_codes)
 
     # Sanity check against PowerCampus
-    for action_id in learned_actions:
-        action_def = ps_powercampus.get_action_definition(action_id)
-        if action_def is None:
-            learned_actions.remove(action_id)
+    learned_actions = sorted(
+        action_id
+        for action_id in learned_actions
+        if ps_powercampus.action_is_active(action_id)
+    )
 
-    admissions_action_codes += learned_actions
+    return add_action_codes(learned_actions)
 
-    # Write new config
-    with open(CONFIG_PATH, mode="w") as file:
-        json.dump(CONFIG, file, indent="\t")
 
+def add_action_codes(action_ids):
+    """Add action_id's to admissions_action_codes in memory, skipping ones already there.
 
-def main_sync(pid=None):
-    """Main body of the program.
+    Returns the list of action_id's added.
+    """
+    admissions_action_codes = SETTINGS.ScheduledActions.admissions_action_codes
+
+    # Concurrent syncs from sync_http may learn the same codes
+    with LEARN_ACTIONS_LOCK:
+        action_ids = [
+            action_id
+            for action_id in dict.fromkeys(action_ids)
+            if action_id not in admissions_action_codes
+        ]
+
+        # SETTINGS holds a copy of the list, so update both
+        admissions_action_codes += action_ids
+        CONFIG["scheduled_actions"]["admissions_action_codes"] += action_ids
+
+    return action_ids
+
+
+def save_config():
+    """Add learned action codes to admissions_action_codes in the config file.
+
+    The file is re-read and only that list is changed, so CONFIG_DEFAULTS and any other in-memory settings aren't written out.
+    """
+    with LEARN_ACTIONS_LOCK:
+        with open(CONFIG_PATH) as file:
+            config = json.loads(file.read())
+
+        admissions_action_codes = config["scheduled_actions"]["admissions_action_codes"]
+        admissions_action_codes += [
+            action_id
+            for action_id in CONFIG["scheduled_actions"]["admissions_action_codes"]
+            if action_id not in admissions_action_codes
+        ]
+
+        with open(CONFIG_PATH, mode="w") as file:
+            json.dump(config, file, indent="\t")
+
+
+def find_duplicate_apps(apps):
+    """Return a list of aid's for apps where one pid has multiple applications with the same YTS + PCD.
 
     Keyword arguments:
-    pid -- specific application GUID to sync (default None)
+    apps -- dict of application dicts from format_app_generic(), keyed by aid
     """
-    global CURRENT_RECORD
-    global RM_MAPPING
+    groups = {}
+    for k, v in apps.items():
+        # Curriculum is needed if and when switching from two to three fields for 9.2.3
+        key = (v["pid"], v["Program"], v["Degree"], v["Curriculum"], v["YearTerm"])
+        groups.setdefault(key, []).append(k)
 
-    verbose_print("Get applicants from Slate...")
+    return [k for group in groups.values() if len(group) > 1 for k in group]
+
+
+def scan_apps(apps, aid_list, pid=None):
+    """Update status flags and PCID for the listed apps in place.
+
+    Scheduled syncs scan all apps with one call to PS_selRAStatusBulk. Single-person syncs from sync_http.py
+    only have a handful of apps, so they use the single-record procedure.
+    """
+    if pid is None:
+        statuses = ps_powercampus.scan_status_bulk(aid_list)
+    else:
+        statuses = {}
+        for k in aid_list:
+            LOCAL.current_record = k
+            statuses[k] = ps_powercampus.scan_status(apps[k])
+
+    for k, (status_ra, status_app, status_calc, pcid) in statuses.items():
+        apps[k].update(
+            {
+                "status_ra": status_ra,
+                "status_app": status_app,
+                "status_calc": status_calc,
+            }
+        )
+        apps[k]["PEOPLE_CODE_ID"] = pcid
+
+
+def write_app(app, app_pc, actions):
+    """Write an existing application's data to PowerCampus. Sets the app's error flag if PowerCampus rejects the record.
+
+    Rows that fail code table validation are skipped and listed in app["invalid_rows"].
+
+    Keyword arguments:
+    app -- an application dict
+    app_pc -- the same application from format_app_sql()
+    actions -- dict of Scheduled Actions from slate_get_actions(), or None if disabled
+
+    Returns:
+    edu_sync_results -- list of education sync results
+    """
+    edu_sync_results = []
+    # Errors for rows that failed code table validation and weren't sent
+    invalid_rows = []
+    pcid = app_pc["PEOPLE_CODE_ID"]
+    academic_year = app_pc["ACADEMIC_YEAR"]
+    academic_term = app_pc["ACADEMIC_TERM"]
+    academic_session = app_pc["ACADEMIC_SESSION"]
+
+    # Single-row updates
+    if SETTINGS.PowerCampus.update_academic_key and app_pc["AcademicGUID"] is not None:
+        ps_powercampus.update_academic_key(app_pc)
+
+    error_flag, error_message = ps_powercampus.update_demographics(app_pc)
+    if error_flag:
+        app["error_flag"] = error_flag
+        app["error_message"] = error_message
+        # Stop making PowerCampus updates for this record
+        return edu_sync_results
+
+    ps_powercampus.update_academic(app_pc)
+    ps_powercampus.update_smsoptin(app_pc)
+
+    # Update PowerCampus Scheduled Actions
+    if SETTINGS.ScheduledActions.enabled:
+        app_actions = actions.get(app["aid"], [])
+
+        for action in app_actions:
+            errors = ps_powercampus.validate_action(
+                action, SETTINGS.ScheduledActions.waive_reason_code
+            )
+            if errors:
+                invalid_rows.extend(errors)
+                continue
+            ps_powercampus.update_action(
+                action,
+                pcid,
+                academic_year,
+                academic_term,
+                academic_session,
+                SETTINGS.ScheduledActions.waive_reason_code,
+                SETTINGS.ScheduledActions.mark_waived_completed,
+            )
+
+        ps_powercampus.cleanup_actions(
+            SETTINGS.ScheduledActions.admissions_action_codes,
+            app_actions,
+            pcid,
+            academic_year,
+            academic_term,
+            academic_session,
+        )
+
+    # Update PowerCampus Education records
+    if "Education" in app_pc:
+        app["schools_not_found"] = []
+        for edu in app_pc["Education"]:
+            errors = ps_powercampus.validate_education(edu)
+            if errors:
+                invalid_rows.extend(errors)
+                continue
+            edu_sync_results.append(
+                ps_powercampus.update_education(pcid, app_pc["pid"], edu)
+                | {k: v for (k, v) in edu.items() if k == "compare_org_found"}
+            )
+
+    # Update PowerCampus Test Score records
+    if "TestScoresNumeric" in app_pc:
+        for test in app_pc["TestScoresNumeric"]:
+            errors = ps_powercampus.validate_test_scores(test)
+            if errors:
+                invalid_rows.extend(errors)
+                continue
+            ps_powercampus.update_test_scores(pcid, test)
+
+    # Update any PowerCampus Notes defined in config
+    for note in SETTINGS.PowerCampus.notes:
+        if note["slate_field"] in app_pc and len(app_pc[note["slate_field"]]) > 0:
+            ps_powercampus.update_note(
+                app_pc, note["slate_field"], note["office"], note["note_type"]
+            )
+
+    # Update any PowerCampus User Defined fields defined in config
+    for udf in SETTINGS.PowerCampus.user_defined_fields:
+        if udf["slate_field"] in app_pc and len(app_pc[udf["slate_field"]]) > 0:
+            ps_powercampus.update_udf(app_pc, udf["slate_field"], udf["pc_field"])
+
+    # Update PowerCampus Stops
+    if "Stops" in app_pc:
+        for stop in app_pc["Stops"]:
+            stop = Stop_from_Slate(stop)
+            errors = ps_powercampus.validate_stop(stop)
+            if errors:
+                invalid_rows.extend(errors)
+                continue
+            ps_powercampus.update_stop(pcid, stop)
+
+    # Update PowerCampus Scholarships
+    if "Scholarships" in app_pc:
+        for scholarship in app_pc["Scholarships"]:
+            scholarship = Scholarship_from_Slate(scholarship)
+            errors = ps_powercampus.validate_scholarship(
+                scholarship, SETTINGS.PowerCampus.validate_scholarship_levels
+            )
+            if errors:
+                invalid_rows.extend(errors)
+                continue
+            ps_powercampus.update_scholarship(
+                pcid,
+                scholarship,
+                SETTINGS.PowerCampus.validate_scholarship_levels,
+            )
+
+    # Update PowerCampus Associations
+    if "Associations" in app_pc:
+        for association in app_pc["Associations"]:
+            association = Association_from_Slate(association)
+            errors = ps_powercampus.validate_association(association)
+            if errors:
+                invalid_rows.extend(errors)
+                continue
+            ps_powercampus.update_association(pcid, association)
+
+    # Rows that were skipped by validation are reported by flag_invalid_rows() once the app's information is read back
+    app["invalid_rows"] = invalid_rows
+
+    return edu_sync_results
+
+
+def flag_invalid_rows(app):
+    """Set the app's error flag if write_app() skipped rows that failed code table validation.
+
+    Reading the profile back resets the error flag, so this runs after it. An error that's already set is kept.
+    """
+    if app.get("invalid_rows") and not app["error_flag"]:
+        app["error_flag"] = True
+        app["error_message"] = SETTINGS.Messages.error.invalid_rows.format(
+            " ".join(app["invalid_rows"])
+        )
+
+
+def update_app(app, actions, write=True):
+    """Update an existing application in PowerCampus and extract information into the app dict.
+
+    Keyword arguments:
+    app -- an application dict with status_calc == "Active"
+    actions -- dict of Scheduled Actions from slate_get_actions(), or None if disabled
+    write -- bool. If False, skip PowerCampus updates and only extract information.
+
+    Returns:
+    edu_sync_results -- list of education sync results
+    fa_checklists -- list of Financial Aid checklist items, if enabled
+    """
+    edu_sync_results = []
+    fa_checklists = []
+
+    # Transform to PowerCampus format, and keep the lookup keys for the bulk procedures
+    app_pc = format_app_sql(app, SCHEMA, RM_MAPPING)
+    app["pc_key"] = pc_key(app, app_pc)
+
+    if write:
+        edu_sync_results = write_app(app, app_pc, actions)
+        # Only a rejected record stops here; apps with invalid rows still get their information read back
+        if app["error_flag"]:
+            return edu_sync_results, fa_checklists
+
+    # Collect information, unless it's fetched for all apps at once.
+    # With bulk_profile, sync_apps() runs the PowerFAIDS steps after the profiles are in.
+    if not SETTINGS.PowerCampus.bulk_profile:
+        app.update(
+            ps_powercampus.get_profile(
+                app_pc, SETTINGS.PowerCampus.campus_emailtype, SETTINGS.Messages
+            )
+        )
+        fa_checklists = update_app_fa(app)
+
+    return edu_sync_results, fa_checklists
+
+
+def update_app_fa(app):
+    """Get PowerFAIDS awards and missing documents for one app, unless they're fetched for all apps at once.
+
+    Returns a list of Financial Aid checklist items, if enabled.
+    """
+    key = app["pc_key"]
+    fa_checklists = []
+
+    # Get PowerFAIDS awards and tracking status
+    if SETTINGS.fa_awards.enabled and not SETTINGS.fa_awards.bulk:
+        fa_awards, fa_status = ps_powercampus.pf_get_awards(
+            key["PCID"],
+            key["GovID"],
+            key["AcademicYear"],
+            key["AcademicTerm"],
+            key["AcademicSession"],
+            SETTINGS.fa_awards.use_finaidmapping,
+        )
+        app.update({"fa_awards": fa_awards, "fa_status": fa_status})
+
+    # Get PowerFAIDS missing documents for the Financial Aid checklist
+    if (
+        SETTINGS.fa_checklist.enabled
+        and not SETTINGS.fa_checklist.bulk
+        and not app["error_flag"]
+    ):
+        fa_checklists = ps_powercampus.pf_get_fachecklist(
+            key["PCID"],
+            key["GovID"],
+            app["AppID"],
+            key["AcademicYear"],
+            key["AcademicTerm"],
+            key["AcademicSession"],
+            SETTINGS.fa_checklist.use_finaidmapping,
+        )
+
+    return fa_checklists
+
+
+def update_app_transaction(app, actions, write=True):
+    """Run update_app() as a single PowerCampus transaction.
+
+    On error, the app's changes are rolled back and the app is flagged instead of stopping the sync.
+    Connection failures are raised, since every remaining app would fail the same way.
+    """
+    try:
+        with ps_powercampus.unit_of_work():
+            return update_app(app, actions, write)
+    except Exception as e:
+        if ps_powercampus.is_connection_error(e):
+            raise
+        app["error_flag"] = True
+        app["error_message"] = SETTINGS.Messages.error.record_rolled_back.format(
+            repr(e)
+        )
+        return [], []
+
+
+def update_app_pooled(update_func, app, actions, commit_stats, write=True):
+    """Run update_func on a worker thread with a connection from the pool, counting commits in the sync's commit_stats."""
+    ps_powercampus.track_commits(commit_stats)
+    with ps_powercampus.pooled_connection():
+        return update_func(app, actions, write)
+
+
+def update_apps(apps, actions, skip_writes=frozenset()):
+    """Run update_app() for each active app without errors, optionally in parallel.
+
+    Keyword arguments:
+    apps -- dict of application dicts
+    actions -- dict of Scheduled Actions from slate_get_actions(), or None if disabled
+    skip_writes -- set of aid's that only need information extracted from PowerCampus
+
+    Returns:
+    edu_sync_results -- list of education sync results
+    fa_checklists -- list of Financial Aid checklist items
+    """
+    edu_sync_results = []
+    fa_checklists = []
+    active_list = [
+        k
+        for (k, v) in apps.items()
+        if v["error_flag"] == False and v["status_calc"] == "Active"
+    ]
+
+    if SETTINGS.PowerCampus.transaction_per_app:
+        update_func = update_app_transaction
+    else:
+        update_func = update_app
+
+    if SETTINGS.PowerCampus.update_workers > 1:
+        with ThreadPoolExecutor(SETTINGS.PowerCampus.update_workers) as executor:
+            futures = {
+                executor.submit(
+                    update_app_pooled,
+                    update_func,
+                    apps[k],
+                    actions,
+                    ps_powercampus.commit_stats(),
+                    k not in skip_writes,
+                ): k
+                for k in active_list
+            }
+            try:
+                for future in as_completed(futures):
+                    # Point current_record() at the failed app if result() raises
+                    LOCAL.current_record = futures[future]
+                    edu, fa = future.result()
+                    edu_sync_results.extend(edu)
+                    fa_checklists.extend(fa)
+            except:
+                executor.shutdown(cancel_futures=True)
+                raise
+    else:
+        for k in active_list:
+            LOCAL.current_record = k
+            edu, fa = update_func(apps[k], actions, k not in skip_writes)
+            edu_sync_results.extend(edu)
+            fa_checklists.extend(fa)
+
+    LOCAL.current_record = None
+    return edu_sync_results, fa_checklists
+
+
+def pc_key(app, app_pc):
+    """Return PowerCampus and PowerFAIDS lookup keys for an app and its format_app_sql() version."""
+    return {
+        "aid": app["aid"],
+        # Only the Slate query for fa_checklist must include AppID
+        "AppID": app.get("AppID"),
+        "PCID": app_pc["PEOPLE_CODE_ID"],
+        "GovID": app["GovernmentId"],
+        "AcademicYear": app_pc["ACADEMIC_YEAR"],
+        "AcademicTerm": app_pc["ACADEMIC_TERM"],
+        "AcademicSession": app_pc["ACADEMIC_SESSION"],
+        "Program": app_pc["PROGRAM"],
+        "Degree": app_pc["DEGREE"],
+        "Curriculum": app_pc["CURRICULUM"],
+        "AcademicGuid": app_pc["AcademicGUID"],
+    }
+
+
+def pc_keys(apps):
+    """Return the lookup keys saved by update_app() for active apps without errors, for the bulk procedures."""
+    return [
+        v["pc_key"]
+        for v in apps.values()
+        if v["error_flag"] == False and v["status_calc"] == "Active"
+    ]
+
+
+def fingerprint_apps(apps, actions):
+    """Return a dict like {aid: fingerprint} for active apps without errors."""
+    if actions is None:
+        actions = {}
+
+    return {
+        k: ps_state.fingerprint(v, actions.get(k))
+        for (k, v) in apps.items()
+        if v["error_flag"] == False and v["status_calc"] == "Active"
+    }
+
+
+def check_sorted_by_pid(rows):
+    """Raise ValueError if any pid's apps aren't next to each other in an iterable of apps."""
+    seen = set()
+    last_pid = None
+    for row in rows:
+        if row["pid"] != last_pid:
+            if row["pid"] in seen:
+                raise ValueError(
+                    "Streaming the Slate query requires it to be sorted by person; pid "
+                    + str(row["pid"])
+                    + " appears in more than one place."
+                )
+            seen.add(row["pid"])
+            last_pid = row["pid"]
+
+
+def chunk_apps(rows, chunk_size):
+    """Group an iterable of apps into lists of at least chunk_size apps.
+
+    A chunk is never split between consecutive apps with the same pid, so the duplicate check still sees all of
+    a person's applications. slate_get_apps() checks that the Slate query is sorted by person first.
+    """
+    chunk = []
+    for row in rows:
+        if len(chunk) >= chunk_size and row["pid"] != chunk[-1]["pid"]:
+            yield chunk
+            chunk = []
+        chunk.append(row)
+
+    if chunk:
+        yield chunk
+
+
+def slate_get_apps(pid=None):
+    """Fetch applications from the Slate query. Yields lists of app dicts.
+
+    Keyword arguments:
+    pid -- specific person GUID to fetch (default None)
+
+    Without slate_query_apps.stream_chunk_size, the whole response is downloaded and yielded as one list.
+    With it, the response is saved to a temporary file, so the connection to Slate isn't held open for the whole
+    sync. The file is checked to be sorted by person, then the "row" array is parsed incrementally and yielded in
+    chunks, so memory use is proportional to the chunk size instead of the number of apps. Streaming requires the
+    ijson package.
+    """
     creds = (
         CONFIG["slate_query_apps"]["username"],
         CONFIG["slate_query_apps"]["password"],
     )
+    chunk_size = CONFIG["slate_query_apps"]["stream_chunk_size"]
+
     if pid is not None:
-        r = requests.get(
+        r = SLATE_SESSION.get(
             CONFIG["slate_query_apps"]["url"], auth=creds, params={"pid": pid}
         )
+        r.raise_for_status()
+        yield json.loads(r.text)["row"]
+    elif chunk_size is None:
+        r = SLATE_SESSION.get(CONFIG["slate_query_apps"]["url"], auth=creds)
+        r.raise_for_status()
+        yield json.loads(r.text)["row"]
     else:
-        r = requests.get(CONFIG["slate_query_apps"]["url"], auth=creds)
-    r.raise_for_status()
-    apps = json.loads(r.text)["row"]
-    verbose_print("\tFetched " + str(len(apps)) + " apps")
+        import ijson
+
+        with tempfile.TemporaryFile() as file:
+            with SLATE_SESSION.get(
+                CONFIG["slate_query_apps"]["url"], auth=creds, stream=True
+            ) as r:
+                r.raise_for_status()
+                for block in r.iter_content(chunk_size=65536):
+                    file.write(block)
+
+            # Fail before syncing anything, rather than miss duplicates split across chunks
+            file.seek(0)
+            check_sorted_by_pid(ijson.items(file, "row.item", use_float=True))
+
+            file.seek(0)
+            yield from chunk_apps(
+                ijson.items(file, "row.item", use_float=True), chunk_size
+            )
 
+
+def sync_apps(apps, pid=None, incremental=False, full_sync=True, configured=None):
+    """Sync a list of apps from Slate with PowerCampus and upload results back to Slate.
+
+    Keyword arguments:
+    apps -- list of app dicts from the Slate query
+    pid -- specific person GUID being synced (default None)
+    incremental -- bool. Record fingerprints of written apps.
+    full_sync -- bool. If False, skip PowerCampus updates for apps whose fingerprint hasn't changed.
+    configured -- dict like {"program": set(), "yearterm": set()} of combinations already auto-configured this run.
+        Updated in place, so a streamed run configures each combination once instead of once per chunk.
+
+    Returns True if any app has errors.
+    """
     # Make a dict of apps with application GUID as the key
     # {AppGUID: { JSON from Slate }
     apps = {k["aid"]: k for k in apps}
-    if len(apps) == 0 and pid is not None:
-        # Assuming we're running in interactive (HTTP) mode if pid param exists
-        raise EOFError(SETTINGS.Messages.error.no_apps)
-    elif len(apps) == 0:
-        # Don't raise an error for scheduled mode
-        return None
+    if len(apps) == 0:
+        return False
 
     verbose_print("Clean up app data from Slate (datatypes, supply nulls, etc.)")
     for k, v in apps.items():
-        CURRENT_RECORD = k
-        apps[k] = format_app_generic(v, CONFIG["slate_upload_active"])
+        LOCAL.current_record = k
+        apps[k] = format_app_generic(v, SCHEMA)
 
     # Set error flag if one pid has multiple applications with the same YTS + PCD
-    duplicates = []
-    for k, v in apps.items():
-        duplicates.extend(
-            [
-                kk
-                for kk, vv in apps.items()
-                if vv["pid"] == v["pid"]
-                and k != kk  # Not self
-                and vv["Program"] == v["Program"]
-                and vv["Degree"] == v["Degree"]
-                # Needed if and when switching from two to three fields for 9.2.3
-                and vv["Curriculum"] == v["Curriculum"]
-                and vv["YearTerm"] == v["YearTerm"]
-            ]
-        )
-
-    for k in duplicates:
+    for k in find_duplicate_apps(apps):
         apps[k]["error_flag"] = True
         apps[k]["error_message"] = SETTINGS.Messages.error.duplicate_apps
 
     if SETTINGS.PowerCampus.autoconfigure_mappings.enabled:
         verbose_print("Auto-configure ProgramOfStudy and recruiterMapping.xml")
-        CURRENT_RECORD = None
+        LOCAL.current_record = None
         mfl = SETTINGS.PowerCampus.mapping_file_location
         vd = SETTINGS.PowerCampus.autoconfigure_mappings.validate_degreq
         mdy = SETTINGS.PowerCampus.autoconfigure_mappings.minimum_degreq_year
         afsi = SETTINGS.PowerCampus.api.app_form_setting_id
-        program_list = [
-            (apps[app]["Program"], apps[app]["Degree"])
-            for app in apps
-            if "Degree" in apps[app]
-        ]
-        yt_list = [apps[app]["YearTerm"] for app in apps if "YearTerm" in apps[app]]
-
-        if ps_powercampus.autoconfigure_mappings(
-            program_list,
-            yt_list,
-            vd,
-            mdy,
-            mfl,
-            afsi,
-        ):
-            RM_MAPPING = ps_powercampus.get_recruiter_mapping(mfl)
+        # Concurrent syncs from sync_http must not patch RM_MAPPING or rewrite the XML at the same time
+        with AUTOCONFIGURE_LOCK:
+            program_set = {
+                (apps[app]["Program"], apps[app]["Degree"])
+                for app in apps
+                if "Degree" in apps[app]
+            }
+            yt_set = {apps[app]["YearTerm"] for app in apps if "YearTerm" in apps[app]}
+
+            # Skip combinations configured by a previous run that are still in recruiterMapping.xml
+            if CONFIG["state_file"] is not None:
+                known_programs = ps_state.get_known_mappings("program")
+                known_yts = ps_state.get_known_mappings("yearterm")
+                program_set = {
+                    p
+                    for p in program_set
+                    if p[0] + "/" + p[1] not in known_programs
+                    or p[0] not in RM_MAPPING["AcademicLevel"]
+                    or p[1] not in RM_MAPPING["AcademicProgram"]["PCDegreeCodeValue"]
+                }
+                yt_set = {
+                    yt
+                    for yt in yt_set
+                    if yt not in known_yts
+                    or yt not in RM_MAPPING["AcademicTerm"]["PCYearCodeValue"]
+                }
+
+            if configured is not None:
+                program_set -= configured["program"]
+                yt_set -= configured["yearterm"]
+
+            if (program_set or yt_set) and ps_powercampus.autoconfigure_mappings(
+                program_set,
+                yt_set,
+                vd,
+                mdy,
+                mfl,
+                afsi,
+                RM_MAPPING,
+            ):
+                # New rows were patched into RM_MAPPING; remember it as the compiled version of the updated file
+                ps_powercampus.save_mapping_cache(
+                    mfl, RM_MAPPING, SETTINGS.PowerCampus.mapping_cache_file
+                )
+
+            if CONFIG["state_file"] is not None and (program_set or yt_set):
+                ps_state.add_known_mappings(
+                    "program", [p[0] + "/" + p[1] for p in program_set]
+                )
+                ps_state.add_known_mappings("yearterm", yt_set)
+
+            if configured is not None:
+                configured["program"] |= program_set
+                configured["yearterm"] |= yt_set
 
     verbose_print("Check each app's status flags/PCID in PowerCampus")
-    for k, v in apps.items():
-        if v["error_flag"] == True:
-            continue
-        CURRENT_RECORD = k
-        status_ra, status_app, status_calc, pcid = ps_powercampus.scan_status(v)
-        apps[k].update(
-            {
-                "status_ra": status_ra,
-                "status_app": status_app,
-                "status_calc": status_calc,
-            }
-        )
-        apps[k]["PEOPLE_CODE_ID"] = pcid
+    scan_apps(apps, [k for (k, v) in apps.items() if v["error_flag"] == False], pid)
 
     verbose_print("Post new or repost unprocessed applications to PowerCampus API")
+    rescan_list = []
     for k, v in apps.items():
         if v["error_flag"] == True:
             continue
-        CURRENT_RECORD = k
+        LOCAL.current_record = k
         if (
             (v["status_ra"] == None)
             or (v["status_ra"] in (1, 2) and v["status_app"] is None)
             or (v["status_ra"] == 0 and v["status_app"] == None)  # 9.2.3 new bad status
         ):
             app, error_flag, error_message = format_app_api(
-                v, SETTINGS.defaults, SETTINGS.Messages
+                v, SCHEMA, SETTINGS.defaults, SETTINGS.Messages
             )
             if error_flag:
                 apps[k]["error_flag"] = error_flag
@@ -438,241 +1297,199 @@ def main_sync(pid=None):
                     app, SETTINGS.PowerCampus.api, SETTINGS.Messages
                 )
                 apps[k]["PEOPLE_CODE_ID"] = pcid
+                rescan_list.append(k)
 
-                # Rescan status
-                status_ra, status_app, status_calc, pcid = ps_powercampus.scan_status(v)
-                apps[k].update(
-                    {
-                        "status_ra": status_ra,
-                        "status_app": status_app,
-                        "status_calc": status_calc,
-                    }
-                )
-                apps[k]["PEOPLE_CODE_ID"] = pcid
+    # Rescan status of posted apps
+    LOCAL.current_record = None
+    scan_apps(apps, rescan_list, pid)
 
     if SETTINGS.ScheduledActions.enabled:
         verbose_print("Get scheduled actions from Slate")
-        CURRENT_RECORD = None
+        LOCAL.current_record = None
         # Send list of app GUID's to Slate; get back checklist items
-        actions_list = slate_get_actions(
+        actions = slate_get_actions(
             [
                 k
                 for (k, v) in apps.items()
-                if v["status_calc"] == "Active" and v["error_flag"] == False
+                if v["error_flag"] == False and v["status_calc"] == "Active"
             ]
         )
 
         if SETTINGS.ScheduledActions.autolearn_action_codes:
-            learn_actions(actions_list)
+            # main_sync() saves learned codes to the config file once per run.
+            # Single-person syncs run in sync_http, so they leave their codes in the state file for the next scheduled sync.
+            learned_actions = learn_actions(actions)
+            if pid is not None and learned_actions and CONFIG["state_file"] is not None:
+                ps_state.add_learned_actions(learned_actions)
 
-    verbose_print("Update existing applications in PowerCampus and extract information")
-    edu_sync_results = []
-    for k, v in apps.items():
-        if v["error_flag"] == True:
-            continue
-        CURRENT_RECORD = k
-        if v["status_calc"] == "Active":
-            # Transform to PowerCampus format
-            app_pc = format_app_sql(v, RM_MAPPING, SETTINGS.PowerCampus)
-            pcid = app_pc["PEOPLE_CODE_ID"]
-            academic_year = app_pc["ACADEMIC_YEAR"]
-            academic_term = app_pc["ACADEMIC_TERM"]
-            academic_session = app_pc["ACADEMIC_SESSION"]
-
-            # Single-row updates
-            if (
-                SETTINGS.PowerCampus.update_academic_key
-                and app_pc["AcademicGUID"] is not None
-            ):
-                ps_powercampus.update_academic_key(app_pc)
-
-            error_flag, error_message = ps_powercampus.update_demographics(app_pc)
-            if error_flag:
-                apps[k]["error_flag"] = error_flag
-                apps[k]["error_message"] = error_message
-                # Stop making PowerCampus updates for this record
-                continue
-
-            ps_powercampus.update_academic(app_pc)
-            ps_powercampus.update_smsoptin(app_pc)
-
-            # Update PowerCampus Scheduled Actions
-            if SETTINGS.ScheduledActions.enabled:
-                app_actions = [
-                    k for k in actions_list if k["aid"] == v["aid"] and "action_id" in k
-                ]
-
-                for action in app_actions:
-                    ps_powercampus.update_action(
-                        action,
-                        pcid,
-                        academic_year,
-                        academic_term,
-                        academic_session,
-                        SETTINGS.ScheduledActions.waive_reason_code,
-                        SETTINGS.ScheduledActions.mark_waived_completed,
-                    )
-
-                ps_powercampus.cleanup_actions(
-                    SETTINGS.ScheduledActions.admissions_action_codes,
-                    app_actions,
-                    pcid,
-                    academic_year,
-                    academic_term,
-                    academic_session,
-                )
-
-            # Update PowerCampus Education records
-            if "Education" in app_pc:
-                apps[k]["schools_not_found"] = []
-                for edu in app_pc["Education"]:
-                    edu_sync_results.append(
-                        ps_powercampus.update_education(pcid, app_pc["pid"], edu)
-                        | {k: v for (k, v) in edu.items() if k == "compare_org_found"}
-                    )
+    else:
+        actions = None
+
+    # Incremental mode skips PowerCampus updates for apps that haven't changed since they were last written
+    skip_writes = set()
+    if incremental:
+        fingerprints = fingerprint_apps(apps, actions)
+        if not full_sync:
+            skip_writes = ps_state.get_unchanged(fingerprints)
+            verbose_print(
+                "Incremental sync: "
+                + str(len(skip_writes))
+                + " of "
+                + str(len(fingerprints))
+                + " active apps unchanged"
+            )
 
-            # Update PowerCampus Test Score records
-            if "TestScoresNumeric" in app_pc:
-                for test in app_pc["TestScoresNumeric"]:
-                    ps_powercampus.update_test_scores(pcid, test)
-
-            # Update any PowerCampus Notes defined in config
-            for note in SETTINGS.PowerCampus.notes:
-                if (
-                    note["slate_field"] in app_pc
-                    and len(app_pc[note["slate_field"]]) > 0
-                ):
-                    ps_powercampus.update_note(
-                        app_pc, note["slate_field"], note["office"], note["note_type"]
-                    )
+    verbose_print("Update existing applications in PowerCampus and extract information")
+    edu_sync_results, fa_checklists = update_apps(apps, actions, skip_writes)
 
-            # Update any PowerCampus User Defined fields defined in config
-            for udf in SETTINGS.PowerCampus.user_defined_fields:
-                if udf["slate_field"] in app_pc and len(app_pc[udf["slate_field"]]) > 0:
-                    ps_powercampus.update_udf(
-                        app_pc, udf["slate_field"], udf["pc_field"]
-                    )
+    if SETTINGS.PowerCampus.bulk_profile:
+        verbose_print("Get PowerCampus profiles for all apps")
+        LOCAL.current_record = None
+        profiles = ps_powercampus.get_profile_bulk(
+            pc_keys(apps), SETTINGS.PowerCampus.campus_emailtype, SETTINGS.Messages
+        )
+        for k, profile in profiles.items():
+            apps[k].update(profile)
+
+        # PowerFAIDS steps skip apps with profile errors, so they run once the profiles are in
+        for k in profiles:
+            LOCAL.current_record = k
+            fa_checklists.extend(update_app_fa(apps[k]))
+        LOCAL.current_record = None
+
+    if SETTINGS.fa_awards.enabled and SETTINGS.fa_awards.bulk:
+        verbose_print("Get PowerFAIDS awards for all apps")
+        LOCAL.current_record = None
+        awards = ps_powercampus.pf_get_awards_bulk(
+            pc_keys(apps), SETTINGS.fa_awards.use_finaidmapping
+        )
+        for k, (fa_awards, fa_status) in awards.items():
+            apps[k].update({"fa_awards": fa_awards, "fa_status": fa_status})
+
+    # Financial Aid checklist items were collected by update_app(), unless bulk mode fetches them for all apps here
+    if SETTINGS.fa_checklist.enabled == True and SETTINGS.fa_checklist.bulk:
+        # Stream the whole population's checklist from PowerFAIDS into the upload
+        LOCAL.current_record = None
+        fa_checklists = ps_powercampus.pf_get_fachecklist_bulk(
+            pc_keys(apps), SETTINGS.fa_checklist.use_finaidmapping
+        )
+        if pid is not None:
+            # Read it on this thread, which holds the connection
+            fa_checklists = list(fa_checklists)
 
-            # Update PowerCampus Stops
-            if "Stops" in app_pc:
-                for stop in app_pc["Stops"]:
-                    stop = Stop_from_Slate(stop)
-                    ps_powercampus.update_stop(pcid, stop)
-
-            # Update PowerCampus Scholarships
-            if "Scholarships" in app_pc:
-                for scholarship in app_pc["Scholarships"]:
-                    scholarship = Scholarship_from_Slate(scholarship)
-                    ps_powercampus.update_scholarship(
-                        pcid,
-                        scholarship,
-                        SETTINGS.PowerCampus.validate_scholarship_levels,
-                    )
+    # Apps with invalid rows are flagged once the steps that read information back are done
+    for v in apps.values():
+        flag_invalid_rows(v)
 
-            # Update PowerCampus Associations
-            if "Associations" in app_pc:
-                for association in app_pc["Associations"]:
-                    association = Association_from_Slate(association)
-                    ps_powercampus.update_association(pcid, association)
+    if incremental:
+        ps_state.save_fingerprints(
+            {
+                k: v
+                for (k, v) in fingerprints.items()
+                if k not in skip_writes and apps[k]["error_flag"] == False
+            }
+        )
 
-            # Collect information
+    uploads = [
+        (
+            "Upload passive fields back to Slate",
+            slate_post_fields,
+            apps,
+            CONFIG["slate_upload_passive"],
+        ),
+        (
+            "Upload active (changed) fields back to Slate",
+            slate_post_apps_changed,
+            apps,
+            CONFIG["slate_upload_active"],
+        ),
+    ]
+    if len(edu_sync_results) > 0 and edu_sync_results[0] is not None:
+        uploads.append(
             (
-                error_flag,
-                error_message,
-                registered,
-                reg_date,
-                readmit,
-                withdrawn,
-                credits,
-                campus_email,
-                advisor,
-                sso_id,
-                academic_guid,
-                custom_1,
-                custom_2,
-                custom_3,
-                custom_4,
-                custom_5,
-            ) = ps_powercampus.get_profile(
-                app_pc, SETTINGS.PowerCampus.campus_emailtype, SETTINGS.Messages
+                "Upload education records sync status back to Slate",
+                slate_post_education_changed,
+                edu_sync_results,
+                CONFIG["slate_upload_schools"],
             )
-            apps[k].update(
-                {
-                    "error_flag": error_flag,
-                    "error_message": error_message,
-                    "registered": registered,
-                    "reg_date": reg_date,
-                    "readmit": readmit,
-                    "withdrawn": withdrawn,
-                    "credits": credits,
-                    "campus_email": campus_email,
-                    "advisor": advisor,
-                    "sso_id": sso_id,
-                    "academic_guid": academic_guid,
-                    "custom_1": custom_1,
-                    "custom_2": custom_2,
-                    "custom_3": custom_3,
-                    "custom_4": custom_4,
-                    "custom_5": custom_5,
-                }
+        )
+    if SETTINGS.fa_checklist.enabled == True:
+        uploads.append(
+            (
+                "Upload Financial Aid checklist to Slate",
+                slate_post_fa_checklist,
+                fa_checklists,
             )
+        )
 
-            # Get PowerFAIDS awards and tracking status
-            if SETTINGS.fa_awards.enabled:
-                fa_awards, fa_status = ps_powercampus.pf_get_awards(
-                    pcid,
-                    v["GovernmentId"],
-                    academic_year,
-                    academic_term,
-                    academic_session,
-                    SETTINGS.fa_awards.use_finaidmapping,
-                )
-                apps[k].update({"fa_awards": fa_awards, "fa_status": fa_status})
+    # A single person's rows are a few small requests, so send them all at once instead of waiting on each
+    slate_post_all(uploads, concurrent=pid is not None)
 
-    verbose_print("Upload passive fields back to Slate")
-    slate_post_fields(apps, CONFIG["slate_upload_passive"])
+    return any(v["error_flag"] == True for v in apps.values())
 
-    verbose_print("Upload active (changed) fields back to Slate")
-    verbose_print(slate_post_apps_changed(apps, CONFIG["slate_upload_active"]))
 
-    if len(edu_sync_results) > 0 and edu_sync_results[0] is not None:
-        verbose_print("Upload education records sync status back to Slate")
-        verbose_print(
-            slate_post_education_changed(
-                edu_sync_results, CONFIG["slate_upload_schools"]
-            )
-        )
+def main_sync(pid=None):
+    """Main body of the program.
 
-    # Collect Financial Aid checklist and upload to Slate
-    if SETTINGS.fa_checklist.enabled == True:
-        verbose_print("Collect Financial Aid checklist and upload to Slate")
-        slate_upload_list = []
-        # slate_upload_fields = {'AppID', 'Code', 'Status', 'Date'}
+    Keyword arguments:
+    pid -- specific application GUID to sync (default None)
+    """
+    ps_powercampus.track_commits()
 
-        for k, v in apps.items():
-            CURRENT_RECORD = k
-            if v["error_flag"] == True:
-                continue
-            if v["status_calc"] == "Active":
-                # Transform to PowerCampus format
-                app_pc = format_app_sql(v, RM_MAPPING, SETTINGS.PowerCampus)
-
-                fa_checklists = ps_powercampus.pf_get_fachecklist(
-                    app_pc["PEOPLE_CODE_ID"],
-                    v["GovernmentId"],
-                    v["AppID"],
-                    app_pc["ACADEMIC_YEAR"],
-                    app_pc["ACADEMIC_TERM"],
-                    app_pc["ACADEMIC_SESSION"],
-                    SETTINGS.fa_checklist.use_finaidmapping,
-                )
+    # Incremental mode skips PowerCampus updates for apps that haven't changed since they were last written
+    incremental = SETTINGS.incremental_sync.enabled and pid is None
+    full_sync = True
+    if incremental:
+        full_sync = ps_state.begin_run(SETTINGS.incremental_sync.full_sync_every)
+        if full_sync:
+            verbose_print("Incremental sync: forcing full resync this run")
+
+    # Load code tables for client-side validation, or reuse them if they're fresh enough
+    if SETTINGS.PowerCampus.validate_code_tables.enabled:
+        ps_powercampus.load_code_tables(SETTINGS.PowerCampus.validate_code_tables.ttl)
+
+    verbose_print("Get applicants from Slate...")
+    app_count = 0
+    errors = False
+    configured = {"program": set(), "yearterm": set()}
+    action_codes = len(SETTINGS.ScheduledActions.admissions_action_codes)
+    seen_aids = set()
+    for apps in slate_get_apps(pid):
+        verbose_print("\tFetched " + str(len(apps)) + " apps")
+        app_count += len(apps)
+        seen_aids.update(app["aid"] for app in apps)
+        if sync_apps(apps, pid, incremental, full_sync, configured):
+            errors = True
+
+    if incremental:
+        ps_state.end_run(full_sync)
+
+    # Single-person syncs don't rewrite the config file
+    if pid is None:
+        learned_actions = []
+        if CONFIG["state_file"] is not None:
+            learned_actions = ps_state.get_learned_actions()
+            add_action_codes(learned_actions)
+        if len(SETTINGS.ScheduledActions.admissions_action_codes) > action_codes:
+            save_config()
+        if learned_actions:
+            ps_state.remove_learned_actions(learned_actions)
+
+    if app_count == 0 and pid is not None:
+        # Assuming we're running in interactive (HTTP) mode if pid param exists
+        raise EOFError(SETTINGS.Messages.error.no_apps)
+    elif app_count == 0:
+        # Don't raise an error for scheduled mode
+        return None
 
-                slate_upload_list = slate_upload_list + fa_checklists
+    # A full scheduled run sees every app in the Slate query, so state kept for any other app is stale
+    if pid is None and full_sync and CONFIG["state_file"] is not None:
+        ps_state.prune(seen_aids)
 
-        slate_post_fa_checklist(slate_upload_list)
+    verbose_print(ps_powercampus.commit_stats().summary())
 
     # Warn if any apps have errors
-    if [k for k in apps if apps[k]["error_flag"] == True]:
+    if errors:
         output_msg = SETTINGS.Messages.success.done_with_errors
     else:
         output_msg = SETTINGS.Messages.success.done
@@ -93,26 +93,78 @@ class Association_from_Slate:
         self.office_held = row["OfficeHeld"]
 
 
+class Field_schema:
+    """Field lists and datatype converters used by the format_app functions.
+
+    Built once per run from ps_models and the config instead of once per app.
+
+    Keyword arguments:
+    cfg_fields -- slate_upload_active config dict
+    config -- Settings.PowerCampus class object
+    """
+
+    def __init__(self, cfg_fields, config):
+        compare_fields = (
+            cfg_fields["fields_string"]
+            + cfg_fields["fields_bool"]
+            + cfg_fields["fields_int"]
+        )
+
+        # Active fields uploaded to Slate when they differ from Slate's compare_ value
+        self.fields_compare = tuple(
+            (field, "compare_" + field) for field in compare_fields
+        )
+
+        self.fields_null = frozenset(
+            [k for (k, v) in ps_models.fields.items() if v["supply_null"] == True]
+            + ["compare_" + field for field in compare_fields]
+        )
+        fields_bool = frozenset(
+            [k for (k, v) in ps_models.fields.items() if v["type"] == bool]
+            + ["compare_" + field for field in cfg_fields["fields_bool"]]
+        )
+        fields_int = frozenset(
+            [k for (k, v) in ps_models.fields.items() if v["type"] == int]
+            + ["compare_" + field for field in cfg_fields["fields_int"]]
+        )
+        self.converters = {k: int for k in fields_int} | {
+            k: format_strtobool for k in fields_bool
+        }
+
+        self.fields_api_verbatim = frozenset(
+            k for (k, v) in ps_models.fields.items() if v["api_verbatim"] == True
+        )
+        self.fields_sql_verbatim = frozenset(
+            [k for (k, v) in ps_models.fields.items() if v["sql_verbatim"] == True]
+            + [n["slate_field"] for n in config.notes]
+            + [f["slate_field"] for f in config.user_defined_fields]
+        )
+
+        self.arrays = ps_models.get_arrays()
+        self.arrays_null = {
+            array: frozenset(k for (k, v) in model.items() if v["supply_null"] == True)
+            for (array, model) in self.arrays.items()
+        }
+
+
 # Should I perhaps have a class like ApplicationRecord that handles datatype transformations, supplying nulls, etc?
 
 
 def format_blank_to_null(x):
     # Converts empty string to None. Accepts dicts, lists, and tuples.
-    # This function derived from radtek @ http://stackoverflow.com/a/37079737/4109658
+    # Originally derived from radtek @ http://stackoverflow.com/a/37079737/4109658
     # CC Attribution-ShareAlike 3.0 https://creativecommons.org/licenses/by-sa/3.0/
-    ret = deepcopy(x)
-    # Handle dictionaries, lists, and tuples. Scrub all values
+    # Containers are rebuilt in a single pass instead of deep-copied at every level, so each value is copied once.
     if isinstance(x, dict):
-        for k, v in ret.items():
-            ret[k] = format_blank_to_null(v)
-    if isinstance(x, (list, tuple)):
-        for k, v in enumerate(ret):
-            ret[k] = format_blank_to_null(v)
-    # Handle None
-    if x == "":
-        ret = None
-    # Finished scrubbing
-    return ret
+        return {k: format_blank_to_null(v) for (k, v) in x.items()}
+    elif isinstance(x, list):
+        return [format_blank_to_null(v) for v in x]
+    elif isinstance(x, tuple):
+        return tuple(format_blank_to_null(v) for v in x)
+    elif x == "":
+        return None
+    else:
+        return x
 
 
 def format_phone_number(number):
@@ -147,32 +199,25 @@ def format_str_digits(s):
     return s.translate(non_digits)
 
 
-def format_app_generic(app, cfg_fields):
-    """Supply missing fields and correct datatypes. Returns a flat dict."""
+def format_app_generic(app, schema):
+    """Supply missing fields and correct datatypes. Returns a flat dict.
+
+    Keyword arguments:
+    app -- an application dict from Slate
+    schema -- Field_schema class object
+    """
 
+    # All input fields are copied to the output here
     mapped = format_blank_to_null(app)
     mapped["error_flag"] = False
     mapped["error_message"] = None
 
-    fields_null = [k for (k, v) in ps_models.fields.items() if v["supply_null"] == True]
-    fields_bool = [k for (k, v) in ps_models.fields.items() if v["type"] == bool]
-    fields_int = [k for (k, v) in ps_models.fields.items() if v["type"] == int]
-    fields_null.extend(["compare_" + field for field in cfg_fields["fields_string"]])
-    fields_null.extend(["compare_" + field for field in cfg_fields["fields_bool"]])
-    fields_null.extend(["compare_" + field for field in cfg_fields["fields_int"]])
-    fields_bool.extend(["compare_" + field for field in cfg_fields["fields_bool"]])
-    fields_int.extend(["compare_" + field for field in cfg_fields["fields_int"]])
-
-    # Copy nullable strings from input to output, then fill in nulls
-    mapped.update(
-        {k: v for (k, v) in app.items() if k in fields_null and k not in mapped}
-    )
-    mapped.update({k: None for k in fields_null if k not in app})
+    # Fill in nulls
+    mapped.update({k: None for k in schema.fields_null.difference(app)})
 
     # Convert integers and booleans
-    mapped.update({k: int(v) for (k, v) in app.items() if k in fields_int})
     mapped.update(
-        {k: format_strtobool(v) for (k, v) in app.items() if k in fields_bool}
+        {k: convert(app[k]) for (k, convert) in schema.converters.items() if k in app}
     )
 
     # Probably a stub in the API
@@ -193,17 +238,15 @@ def format_app_generic(app, cfg_fields):
         mapped["Degree"] = app["Degree"]
         mapped["Curriculum"] = None
 
-    # Pass through all other fields
-    mapped.update({k: v for (k, v) in app.items() if k not in mapped})
-
     return mapped
 
 
-def format_app_api(app, cfg_defaults, Messages):
+def format_app_api(app, schema, cfg_defaults, Messages):
     """Remap application to Recruiter/Web API format.
 
     Keyword arguments:
     app -- an application dict
+    schema -- Field_schema class object
     """
 
     mapped = {}
@@ -216,10 +259,7 @@ def format_app_api(app, cfg_defaults, Messages):
         error_flag = True
 
     # Pass through fields
-    fields_verbatim = [
-        k for (k, v) in ps_models.fields.items() if v["api_verbatim"] == True
-    ]
-    mapped.update({k: v for (k, v) in app.items() if k in fields_verbatim})
+    mapped.update({k: v for (k, v) in app.items() if k in schema.fields_api_verbatim})
 
     # Supply empty arrays. Implementing these would require more logic.
     fields_arr = ["Relationships", "Activities", "EmergencyContacts", "Education"]
@@ -321,24 +361,19 @@ def format_app_api(app, cfg_defaults, Messages):
     return mapped, error_flag, error_message
 
 
-def format_app_sql(app, mapping, config):
+def format_app_sql(app, schema, mapping):
     """Remap application to PowerCampus SQL format.
 
     Keyword arguments:
     app -- an application dict
+    schema -- Field_schema class object
     mapping -- a mapping dict derived from recruiterMapping.xml
-    config -- Settings class object
     """
 
     mapped = {}
 
     # Pass through fields
-    fields_verbatim = [
-        k for (k, v) in ps_models.fields.items() if v["sql_verbatim"] == True
-    ]
-    fields_verbatim.extend([n["slate_field"] for n in config.notes])
-    fields_verbatim.extend([f["slate_field"] for f in config.user_defined_fields])
-    mapped.update({k: v for (k, v) in app.items() if k in fields_verbatim})
+    mapped.update({k: v for (k, v) in app.items() if k in schema.fields_sql_verbatim})
 
     # Gender is hardcoded into the PowerCampus Web API, but [WebServices].[spSetDemographics] has different hardcoded values.
     # API None  =   Error
@@ -420,19 +455,15 @@ def format_app_sql(app, mapping, config):
 
     # Format Education and TestScoresNumeric if present. Newer arrays are implemented as classes.
     # Currently only supplies nulls; no datatype manipulations performed.
-    array_models = ps_models.get_arrays()
-    array_names = [k for (k, v) in array_models.items() if k in app]
+    array_names = [k for k in schema.arrays if k in app]
 
     for array in array_names:
         mapped[array] = deepcopy(app[array])
-        fields_null = [
-            k for (k, v) in array_models[array].items() if v["supply_null"] == True
-        ]
+        fields_null = schema.arrays_null[array]
 
         # Supply nulls
         for item in mapped[array]:
-            item.update({k: v for (k, v) in item.items() if k in fields_null})
-            item.update({k: None for k in fields_null if k not in item})
+            item.update({k: None for k in fields_null.difference(item)})
 
     # Pass through arrays implemented as classes
     array_classes = ["Stops", "Scholarships", "Associations"]
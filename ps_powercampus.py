@@ -1,33 +1,230 @@
 import requests
+import hashlib
 import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 import pyodbc
 import xml.etree.ElementTree as ET
 import ps_models
 
 
-def init(config, verbose):
-    global CNXN
-    global CURSOR
+class ConnectionPool:
+    """Reusable pyodbc connections, opened on demand. Each connection is only used by one thread at a time."""
+
+    def __init__(self, database_string):
+        self.database_string = database_string
+        self.idle = queue.LifoQueue()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            cnxn = pyodbc.connect(self.database_string)
+            with self.lock:
+                self.connections.append(cnxn)
+            return cnxn
+
+    def release(self, cnxn):
+        self.idle.put(cnxn)
+
+    def prune(self):
+        """Close idle connections that no longer answer a trivial query. Return how many were closed."""
+        alive = []
+        pruned = 0
+        while True:
+            try:
+                cnxn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                cnxn.cursor().execute("SELECT 1").fetchone()
+            except pyodbc.Error:
+                self.discard(cnxn)
+                pruned += 1
+            else:
+                alive.append(cnxn)
+
+        # Put survivors back in their original LIFO order
+        for cnxn in reversed(alive):
+            self.idle.put(cnxn)
+        return pruned
+
+    def discard(self, cnxn):
+        """Close a broken connection instead of returning it to the pool."""
+        with self.lock:
+            if cnxn in self.connections:
+                self.connections.remove(cnxn)
+        try:
+            cnxn.close()
+        except pyodbc.Error:
+            pass
+
+    def close(self):
+        with self.lock:
+            for cnxn in self.connections:
+                cnxn.close()
+            self.connections = []
+        self.idle = queue.LifoQueue()
+
+
+class ThreadConnection:
+    """Stand-in for the CNXN and CURSOR globals that forwards to the current thread's connection or cursor.
+
+    This lets the functions in this module run unchanged on worker threads, each of which binds its own pooled connection.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(getattr(LOCAL, self.name), attr)
+
+
+class CommitStats:
+    """Thread-safe counters for commits actually sent to SQL Server and commits deferred by unit_of_work()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.commits = 0
+        self.deferred = 0
+        self.seconds = 0.0
+
+    def add(self, commits=0, deferred=0, seconds=0.0):
+        with self.lock:
+            self.commits += commits
+            self.deferred += deferred
+            self.seconds += seconds
+
+    def summary(self):
+        msg = "\tSQL commits: {} in {:.3f} s".format(self.commits, self.seconds)
+        if self.commits > 0:
+            msg += " ({:.1f} ms each)".format(self.seconds / self.commits * 1000)
+        if self.deferred > 0:
+            msg += "; {} per-statement commits deferred".format(self.deferred)
+        return msg
+
+
+LOCAL = threading.local()
+POOL = None
+API_SESSION = None  # Keep-alive session for the PowerCampus Web API; see connect_api()
+API_LOCK = threading.Lock()
+CNXN = ThreadConnection("cnxn")
+CURSOR = ThreadConnection("cursor")
+# Compiled recruiterMapping.xml; see get_recruiter_mapping_cached()
+MAPPING_CACHE = None
+CODE_TABLES = None  # Code values for client-side validation; see load_code_tables()
+CODE_TABLES_LOADED = None
+
+
+def commit_stats():
+    """Return the CommitStats of the sync running on the current thread; see track_commits()."""
+    stats = getattr(LOCAL, "commit_stats", None)
+    if stats is None:
+        stats = LOCAL.commit_stats = CommitStats()
+    return stats
+
+
+def track_commits(stats=None):
+    """Count the current thread's commits in stats, or in a new CommitStats if None. Returns stats.
+
+    Each sync starts its own count, and passes it to the worker threads that make updates for it.
+    """
+    LOCAL.commit_stats = stats if stats is not None else CommitStats()
+    return LOCAL.commit_stats
+
+
+def bind_connection(cnxn):
+    """Make CNXN and CURSOR refer to cnxn for the current thread."""
+    LOCAL.cnxn = cnxn
+    LOCAL.cursor = cnxn.cursor()
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from the pool and bind it to the current thread for the duration of the block."""
+    cnxn = POOL.acquire()
+    bind_connection(cnxn)
+    try:
+        yield cnxn
+    except Exception:
+        try:
+            cnxn.rollback()
+        except pyodbc.Error:
+            # The connection itself failed; let the next borrower open a new one
+            POOL.discard(cnxn)
+            cnxn = None
+        raise
+    finally:
+        del LOCAL.cnxn, LOCAL.cursor
+        if cnxn is not None:
+            POOL.release(cnxn)
+
+
+def is_connection_error(e):
+    """Return True if e means the SQL connection itself failed, rather than one statement.
+
+    Covers pyodbc.OperationalError and SQLSTATE classes 08 (connection exception) and HYT (timeout).
+    """
+    if isinstance(e, pyodbc.OperationalError):
+        return True
+    if isinstance(e, pyodbc.Error) and len(e.args) > 0 and isinstance(e.args[0], str):
+        return e.args[0][:2] == "08" or e.args[0][:3] == "HYT"
+    return False
+
+
+def commit():
+    """Commit the current thread's transaction, unless a unit_of_work() is open."""
+    if getattr(LOCAL, "unit_of_work", False):
+        commit_stats().add(deferred=1)
+    else:
+        start = time.perf_counter()
+        CNXN.commit()
+        commit_stats().add(commits=1, seconds=time.perf_counter() - start)
+
+
+@contextmanager
+def unit_of_work():
+    """Run the block as a single transaction on the current thread's connection.
+
+    Commits made by the functions in this module are deferred until the block exits. The whole block is rolled back on error.
+    """
+    LOCAL.unit_of_work = True
+    try:
+        yield
+    except:
+        CNXN.rollback()
+        raise
+    else:
+        LOCAL.unit_of_work = False
+        commit()
+    finally:
+        LOCAL.unit_of_work = False
+
+
+def init(config, verbose, api_pool_size=1):
+    global API_POOL_SIZE
     global CONFIG
     global VERBOSE
     global PC_GUID_SUPPORT  # PowerCampus 9.2.1 and later has GUID ID's on many tables.
 
     CONFIG = config
     VERBOSE = verbose
+    API_POOL_SIZE = api_pool_size
 
-    # Microsoft SQL Server connection.
-    CNXN = pyodbc.connect(config.database_string)
-    CURSOR = CNXN.cursor()
+    connect_database()
+    r = connect_api()
 
     # Print a test of connections
-    r = requests.get(
-        config.api.url + "api/version",
-        auth=config.api.creds,
-        headers=config.api.headers,
-    )
     verbose_print("PowerCampus API Status: " + str(r.status_code))
     verbose_print(r.text)
-    r.raise_for_status()
     verbose_print("Database:" + CNXN.getinfo(pyodbc.SQL_DATABASE_NAME))
 
     # Get database version
@@ -44,10 +241,96 @@ def init(config, verbose):
     update_app_form_autoprocess(config.api.app_form_setting_id, True)
 
 
+def connect_database():
+    """Open the SQL connection pool. The main thread keeps one connection; worker threads borrow others from the pool."""
+    global POOL
+
+    POOL = ConnectionPool(CONFIG.database_string)
+    bind_connection(POOL.acquire())
+
+
+def connect_api():
+    """Open a new keep-alive session for the PowerCampus Web API, check it, and then replace any existing one with it.
+
+    Return the api/version response. If the check fails, the existing session is kept and the error is raised.
+    """
+    global API_SESSION
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=API_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    r = check_api(session)
+
+    # Other syncs may be in the middle of a request on the old session, so it isn't closed here.
+    # Its connections are closed once they're done with it and it's garbage collected.
+    with API_LOCK:
+        API_SESSION = session
+
+    return r
+
+
+def check_api(session=None):
+    """Call api/version on session, or the current API session. Return the response; raise requests.RequestException on failure."""
+    if session is None:
+        session = API_SESSION
+    r = session.get(
+        CONFIG.api.url + "api/version",
+        auth=CONFIG.api.creds,
+        headers=CONFIG.api.headers,
+        timeout=30,
+    )
+    r.raise_for_status()
+    return r
+
+
+def check_database():
+    """Run a trivial query on a pooled connection. Raise pyodbc.Error on failure; the broken connection is discarded."""
+    with pooled_connection():
+        CURSOR.execute("SELECT 1")
+        CURSOR.fetchone()
+
+
+def health_check():
+    """Check the idle SQL connections and the API session, and reconnect only the one that failed.
+
+    Return a dict of {"database"|"api": seconds spent reconnecting} for each resource that was reconnected.
+    Raise if a resource still fails after reconnecting.
+    """
+    recovered = {}
+
+    # Check every idle connection, so a broken one isn't handed to a later sync
+    start = time.perf_counter()
+    pruned = POOL.prune()
+    try:
+        check_database()  # Opens a fresh connection if no idle one survived
+    except pyodbc.Error:
+        pruned += 1
+        check_database()
+    if pruned:
+        recovered["database"] = time.perf_counter() - start
+
+    try:
+        check_api()
+    except requests.RequestException:
+        start = time.perf_counter()
+        connect_api()
+        recovered["api"] = time.perf_counter() - start
+
+    return recovered
+
+
 def de_init():
+    global API_SESSION
+    global CODE_TABLES
+
     # Clean up connections.
-    if CNXN:
-        CNXN.close()  # SQL
+    if POOL:
+        POOL.close()  # SQL
+    if API_SESSION is not None:
+        API_SESSION.close()
+        API_SESSION = None
+    CODE_TABLES = None
 
 
 def verbose_print(x):
@@ -69,6 +352,7 @@ def autoconfigure_mappings(
     minimum_degreq_year,
     mapping_file_location,
     app_form_setting_id,
+    rm_mapping=None,
 ):
     """
     Automatically insert new Program/Degree/Curriculum combinations into ProgramOfStudy and recruiterMapping.xml
@@ -77,11 +361,13 @@ def autoconfigure_mappings(
     and that YearTerm values are like YEAR/TERM/SESSION.
 
     Keyword aguments:
-    program_list -- list of tuples like [('PROGRAM','DEGREE/CURRICULUM'), (...)]
-    yt_list -- list of strings like ['YEAR/TERM/SESSION', ...]
+    program_list -- list or set of tuples like [('PROGRAM','DEGREE/CURRICULUM'), (...)]
+    yt_list -- list or set of strings like ['YEAR/TERM/SESSION', ...]
     validate_degreq -- bool. If True, check against DEGREQ for sanity using minimum_degreq_year.
     minimum_degreq_year -- str
     mapping_file_location -- str. Path to recruiterMapping.xml
+    app_form_setting_id -- int
+    rm_mapping -- dict from get_recruiter_mapping(). If passed, new rows are added to it as well as to the XML.
 
     Returns True if XML mapping changed.
     """
@@ -123,38 +409,57 @@ def autoconfigure_mappings(
         #     yts_set.add(tuple(yts))
 
     # Update ProgramOfStudy table; optionally validate against DEGREQ table
-    for pdc in pdc_set:
+    # All combinations are validated and inserted in one set-based call
+    if pdc_set:
         CURSOR.execute(
-            "execute [custom].[PS_updProgramOfStudy] ?, ?, ?, ?, ?",
-            pdc[0],
-            pdc[1],
-            pdc[2],
+            "execute [custom].[PS_updProgramOfStudyBulk] ?, ?, ?",
+            json.dumps(
+                [
+                    {"Program": pdc[0], "Degree": pdc[1], "Curriculum": pdc[2]}
+                    for pdc in sorted(pdc_set)
+                ]
+            ),
             minimum_degreq_year,
             app_form_setting_id,
         )
-    CNXN.commit()
+        commit()
 
     # Validate against ACADEMICCALENDAR table
-    for yts in yts_set:
+    if yts_set:
         CURSOR.execute(
-            "execute [custom].[PS_selAcademicCalendar] ?, ?, ?", yts[0], yts[1], yts[2]
+            "execute [custom].[PS_selAcademicCalendarBulk] ?",
+            json.dumps(
+                [
+                    {"Year": yts[0], "Term": yts[1], "Session": yts[2]}
+                    for yts in sorted(yts_set)
+                ]
+            ),
         )
-        row = CURSOR.fetchone()
-        if row is None:
+        found = {(row.Year, row.Term, row.Session) for row in CURSOR.fetchall()}
+        missing = sorted(yts_set - found)
+        if missing:
             raise Exception(
                 "Year/Term/Session '"
-                + str(yts)
+                + str(missing[0])
                 + "' not found in ACADEMICCALENDAR table."
             )
 
     # Update recruiterMapping.xml
-    def check_for_duplicates(node):
-        """Check for duplicate RCCodeValues and raise error if found."""
+    def index_rc_codes(node):
+        """Return a node's RCCodeValues as a set for membership tests. Raise error if any are duplicated."""
         rc_codes = [row.get("RCCodeValue") for row in node.findall("row")]
         if len(rc_codes) != len(set(rc_codes)):
             raise ValueError(
                 f"recruiterMapping.xml contains duplicate RCCodeValue keys in node {node}."
             )
+        return set(rc_codes)
+
+    def add_row(node, rc_codes, attrib):
+        """Add a row to the XML node, its RCCodeValue index, and the compiled mapping, if one was passed."""
+        ET.SubElement(node, "row", attrib=attrib)
+        rc_codes.add(attrib["RCCodeValue"])
+        if rm_mapping is not None:
+            patch_mapping(rm_mapping, node, attrib)
 
     xml_changed = False
     with open(mapping_file_location, encoding="utf-8-sig") as treeFile:
@@ -162,10 +467,10 @@ def autoconfigure_mappings(
         root = tree.getroot()
 
     aca_level = root.find("AcademicLevel")
-    check_for_duplicates(aca_level)
+    level_codes = index_rc_codes(aca_level)
 
     for p in p_set:
-        if aca_level.find("./row[@RCCodeValue='" + p + "']") is None:
+        if p not in level_codes:
             xml_changed = True
             attrib = {
                 "RCCodeValue": p,
@@ -173,14 +478,14 @@ def autoconfigure_mappings(
                 "PCCodeValue": p,
                 "PCCodeDesc": "",
             }
-            ET.SubElement(aca_level, "row", attrib=attrib)
+            add_row(aca_level, level_codes, attrib)
 
     aca_prog = root.find("AcademicProgram")
-    check_for_duplicates(aca_prog)
+    prog_codes = index_rc_codes(aca_prog)
 
     for dc in dc_set:
         rc_code = dc[0] + "/" + dc[1]
-        if aca_prog.find("./row[@RCCodeValue='" + rc_code + "']") is None:
+        if rc_code not in prog_codes:
             xml_changed = True
             attrib = {
                 "RCCodeValue": rc_code,
@@ -190,14 +495,14 @@ def autoconfigure_mappings(
                 "PCCurriculumCodeValue": dc[1],
                 "PCCurriculumDesc": "",
             }
-            ET.SubElement(aca_prog, "row", attrib=attrib)
+            add_row(aca_prog, prog_codes, attrib)
 
     aca_term = root.find("AcademicTerm")
-    check_for_duplicates(aca_term)
+    term_codes = index_rc_codes(aca_term)
 
     for yts in yts_set:
         rc_code = yts[0] + "/" + yts[1] + "/" + yts[2]
-        if aca_term.find("./row[@RCCodeValue='" + rc_code + "']") is None:
+        if rc_code not in term_codes:
             xml_changed = True
             attrib = {
                 "RCCodeValue": rc_code,
@@ -209,7 +514,7 @@ def autoconfigure_mappings(
                 "PCSessionCodeValue": yts[2],
                 "PCSessionDesc": "",
             }
-            ET.SubElement(aca_term, "row", attrib=attrib)
+            add_row(aca_term, term_codes, attrib)
 
     if xml_changed:
         tree.write(mapping_file_location, encoding="utf-8", xml_declaration=True)
@@ -270,6 +575,91 @@ def get_recruiter_mapping(mapping_file_location):
     return rm_mapping
 
 
+def patch_mapping(rm_mapping, node, attrib):
+    """Add one recruiterMapping.xml row to a dict from get_recruiter_mapping() without re-reading the file."""
+    rc_code = attrib["RCCodeValue"]
+    if node.get("NumberOfPowerCampusFieldsMapped") == "1":
+        rm_mapping[node.tag][rc_code] = attrib["PCCodeValue"]
+    else:
+        for fn in rm_mapping[node.tag]:
+            rm_mapping[node.tag][fn][rc_code] = attrib.get(fn)
+
+
+def mapping_file_key(mapping_file_location):
+    """Return the modification time and size of recruiterMapping.xml for cheap change detection."""
+    stat = os.stat(mapping_file_location)
+    return {
+        "path": mapping_file_location,
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+
+
+def save_mapping_cache(mapping_file_location, rm_mapping, cache_file=None, sha256=None):
+    """Remember rm_mapping as the compiled version of the current recruiterMapping.xml.
+
+    Keyword arguments:
+    mapping_file_location -- str. Path to recruiterMapping.xml
+    rm_mapping -- dict from get_recruiter_mapping()
+    cache_file -- str. Optional local path to also store the compiled mapping as JSON.
+    sha256 -- str. Hash of the file, if already known.
+    """
+    global MAPPING_CACHE
+
+    if sha256 is None:
+        with open(mapping_file_location, "rb") as file:
+            sha256 = hashlib.sha256(file.read()).hexdigest()
+
+    MAPPING_CACHE = {
+        "key": mapping_file_key(mapping_file_location),
+        "sha256": sha256,
+        "mapping": rm_mapping,
+    }
+    if cache_file is not None:
+        with open(cache_file, "w") as file:
+            json.dump(MAPPING_CACHE, file)
+
+
+def get_recruiter_mapping_cached(mapping_file_location, cache_file=None):
+    """Return get_recruiter_mapping(), parsing recruiterMapping.xml again only if it has changed.
+
+    The compiled mapping is kept in memory and optionally in cache_file on local disk. The file's modification
+    time and size are compared first. If they differ, the file's SHA-256 hash decides whether it really changed.
+
+    Keyword arguments:
+    mapping_file_location -- str. Path to recruiterMapping.xml
+    cache_file -- str. Optional local path for the compiled mapping.
+    """
+    global MAPPING_CACHE
+
+    key = mapping_file_key(mapping_file_location)
+    if MAPPING_CACHE is not None and MAPPING_CACHE["key"] == key:
+        return MAPPING_CACHE["mapping"]
+
+    candidates = [MAPPING_CACHE]
+    if cache_file is not None and os.path.exists(cache_file):
+        with open(cache_file) as file:
+            candidates.append(json.load(file))
+    candidates = [
+        c for c in candidates if c and c["key"]["path"] == mapping_file_location
+    ]
+
+    for cached in candidates:
+        if cached["key"] == key:
+            MAPPING_CACHE = cached
+            return cached["mapping"]
+
+    # Modified time or size changed, but the contents may not have
+    with open(mapping_file_location, "rb") as file:
+        sha256 = hashlib.sha256(file.read()).hexdigest()
+    rm_mapping = next((c["mapping"] for c in candidates if c["sha256"] == sha256), None)
+    if rm_mapping is None:
+        rm_mapping = get_recruiter_mapping(mapping_file_location)
+
+    save_mapping_cache(mapping_file_location, rm_mapping, cache_file, sha256)
+    return rm_mapping
+
+
 def post_api(app, config, Messages):
     """Post an application to PowerCampus.
     Return  PEOPLE_CODE_ID if application was automatically accepted or None for all other conditions.
@@ -278,13 +668,6 @@ def post_api(app, config, Messages):
     x -- an application dict
     """
 
-    creds = None
-    headers = None
-    if config.auth_method == "basic":
-        creds = (config.username, config.password)
-    elif config.auth_method == "token":
-        headers = {"Authorization": config.token}
-
     # Check for duplicate person. If found, temporarily toggle auto-process off.
     dup_found = False
     CURSOR.execute("EXEC [custom].[PS_selPersonDuplicate] ?", app["GovernmentId"])
@@ -295,8 +678,11 @@ def post_api(app, config, Messages):
 
     # Expose error text response from API, replace useless error message(s).
     try:
-        r = requests.post(
-            config.url + "api/applications", json=app, auth=creds, headers=headers
+        r = API_SESSION.post(
+            config.url + "api/applications",
+            json=app,
+            auth=config.creds,
+            headers=config.headers,
         )
         r.raise_for_status()
         # The API returns 202 for mapping errors. Technically 202 is appropriate, but it should bubble up to the user.
@@ -360,14 +746,43 @@ def scan_status(x):
     pcid -- PEOPLE_CODE_ID (string)
     """
 
+    CURSOR.execute("EXEC [custom].[PS_selRAStatus] ?", x["aid"])
+    row = CURSOR.fetchone()
+
+    return format_status(row)
+
+
+def scan_status_bulk(aids):
+    """Query the PowerCampus status of many applications with a single call to PS_selRAStatusBulk.
+
+    Keyword arguments:
+    aids -- iterable of ApplicationNumber GUID's
+
+    Returns:
+    statuses -- dict like {aid: (ra_status, apl_status, computed_status, pcid)}. See scan_status().
+    """
+
+    # SQL Server returns uppercase GUID's, so match case-insensitively and key the output by the caller's aid.
+    aids = {str(aid).lower(): aid for aid in aids}
+    statuses = {aid: (None, None, None, None) for aid in aids.values()}
+    if len(aids) == 0:
+        return statuses
+
+    CURSOR.execute("EXEC [custom].[PS_selRAStatusBulk] ?", json.dumps(list(aids)))
+    for row in CURSOR.fetchall():
+        aid = aids[str(row.ApplicationNumber).lower()]
+        statuses[aid] = format_status(row)
+
+    return statuses
+
+
+def format_status(row):
+    """Return three status indicators and PowerCampus ID number from a PS_selRAStatus row, which may be None."""
     ra_status = None
     apl_status = None
     computed_status = None
     pcid = None
 
-    CURSOR.execute("EXEC [custom].[PS_selRAStatus] ?", x["aid"])
-    row = CURSOR.fetchone()
-
     if row is not None:
         ra_status = row.ra_status
         apl_status = row.apl_status
@@ -390,10 +805,70 @@ def scan_status(x):
     return ra_status, apl_status, computed_status, pcid
 
 
+def blank_profile(error_message, academic_guid=None):
+    """Return a profile for an app whose ACADEMIC row couldn't be read. See get_profile()."""
+    return {
+        "error_flag": True,
+        "error_message": error_message,
+        "registered": False,
+        "reg_date": None,
+        "readmit": False,
+        "withdrawn": False,
+        "credits": "0.00",
+        "campus_email": None,
+        "advisor": None,
+        "sso_id": None,
+        "academic_guid": academic_guid,
+        "custom_1": None,
+        "custom_2": None,
+        "custom_3": None,
+        "custom_4": None,
+        "custom_5": None,
+    }
+
+
+def format_profile(row, academic_guid, Messages):
+    """Return a profile from a PS_selProfile or PS_selProfileBulk row. See get_profile()."""
+    profile = blank_profile(None, academic_guid)
+    profile["error_flag"] = False
+
+    if row.Registered == "Y":
+        profile["registered"] = True
+        profile["reg_date"] = str(row.REG_VAL_DATE)
+        profile["credits"] = str(row.CREDITS)
+
+    profile["campus_email"] = row.CampusEmail
+    profile["advisor"] = row.AdvisorUsername
+    profile["sso_id"] = row.Username
+    profile["custom_1"] = row.custom_1
+    profile["custom_2"] = row.custom_2
+    profile["custom_3"] = row.custom_3
+    profile["custom_4"] = row.custom_4
+    profile["custom_5"] = row.custom_5
+
+    # College Attend and Readmits
+    college_attend = row.COLLEGE_ATTEND
+    if college_attend == CONFIG.readmit_code:
+        profile["readmit"] = True
+    elif college_attend == "" or college_attend is None:
+        college_attend = "blank"
+
+    if college_attend not in CONFIG.valid_college_attend:
+        profile["error_flag"] = True
+        profile["error_message"] = Messages.error.invalid_college_attend.format(
+            college_attend
+        )
+
+    if row.Withdrawn == "Y":
+        profile["withdrawn"] = True
+
+    return profile
+
+
 def get_profile(app, campus_email_type, Messages):
     """Fetch ACADEMIC row data and email address from PowerCampus.
 
-    Returns:
+    Returns a dict with these keys, ready to merge into the Slate app:
     error_flag -- True/False
     error_message -- string
     registered -- True/False
@@ -412,22 +887,7 @@ def get_profile(app, campus_email_type, Messages):
     custom_5
     """
 
-    error_flag = True
-    error_message = None
-    registered = False
-    reg_date = None
-    readmit = False
-    withdrawn = False
-    credits = "0.00"
-    campus_email = None
-    advisor = None
-    sso_id = None
     academic_guid = None
-    custom_1 = None
-    custom_2 = None
-    custom_3 = None
-    custom_4 = None
-    custom_5 = None
 
     if PC_GUID_SUPPORT:
         CURSOR.execute(
@@ -445,25 +905,7 @@ def get_profile(app, campus_email_type, Messages):
         row = CURSOR.fetchone()
         if row.ErrorFlag == 1:
             # ACADEMIC row found by GUID but YTSPDC or PCID does not match.
-            error_message = row.ErrorMessage
-            return (
-                error_flag,
-                error_message,
-                registered,
-                reg_date,
-                readmit,
-                withdrawn,
-                credits,
-                campus_email,
-                advisor,
-                sso_id,
-                academic_guid,
-                custom_1,
-                custom_2,
-                custom_3,
-                custom_4,
-                custom_5,
-            )
+            return blank_profile(row.ErrorMessage)
         else:
             academic_guid = row.AcademicGuid
 
@@ -482,55 +924,47 @@ def get_profile(app, campus_email_type, Messages):
 
     if row is None:
         # ACADEMIC row not found by YTSPDC or GUID.
-        error_message = Messages.error.academic_row_not_found
+        return blank_profile(Messages.error.academic_row_not_found, academic_guid)
     else:
-        error_flag = False
-        if row.Registered == "Y":
-            registered = True
-            reg_date = str(row.REG_VAL_DATE)
-            credits = str(row.CREDITS)
-
-        campus_email = row.CampusEmail
-        advisor = row.AdvisorUsername
-        sso_id = row.Username
-        custom_1 = row.custom_1
-        custom_2 = row.custom_2
-        custom_3 = row.custom_3
-        custom_4 = row.custom_4
-        custom_5 = row.custom_5
-
-        # College Attend and Readmits
-        college_attend = row.COLLEGE_ATTEND
-        if college_attend == CONFIG.readmit_code:
-            readmit = True
-        elif college_attend == "" or college_attend is None:
-            college_attend = "blank"
-
-        if college_attend not in CONFIG.valid_college_attend:
-            error_flag = True
-            error_message = Messages.error.invalid_college_attend.format(college_attend)
-
-        if row.Withdrawn == "Y":
-            withdrawn = True
-
-    return (
-        error_flag,
-        error_message,
-        registered,
-        reg_date,
-        readmit,
-        withdrawn,
-        credits,
-        campus_email,
-        advisor,
-        sso_id,
-        academic_guid,
-        custom_1,
-        custom_2,
-        custom_3,
-        custom_4,
-        custom_5,
+        return format_profile(row, academic_guid, Messages)
+
+
+def get_profile_bulk(apps, campus_email_type, Messages):
+    """Fetch ACADEMIC row data and email address for many apps with a single call to PS_selProfileBulk.
+
+    Requires PowerCampus 9.2.1 or later.
+
+    Keyword arguments:
+    apps -- list of dicts with aid, PCID, AcademicYear, AcademicTerm, AcademicSession, Program, Degree, Curriculum,
+            and AcademicGuid
+    campus_email_type -- string
+    Messages -- Settings.Messages class object
+
+    Returns:
+    profiles -- dict like {aid: profile}. See get_profile().
+    """
+    profiles = {
+        app["aid"]: blank_profile(Messages.error.academic_row_not_found) for app in apps
+    }
+    if len(profiles) == 0:
+        return profiles
+
+    CURSOR.execute(
+        "EXEC [custom].[PS_selProfileBulk] ?, ?", json.dumps(apps), campus_email_type
     )
+    for row in CURSOR.fetchall():
+        if row.ErrorFlag == 1:
+            # ACADEMIC row found by GUID but YTSPDC or PCID does not match.
+            profiles[row.aid] = blank_profile(row.ErrorMessage)
+        elif row.ProfileFound == 1:
+            profiles[row.aid] = format_profile(row, row.AcademicGuid, Messages)
+        else:
+            # ACADEMIC row not found by YTSPDC or GUID.
+            profiles[row.aid] = blank_profile(
+                Messages.error.academic_row_not_found, row.AcademicGuid
+            )
+
+    return profiles
 
 
 def update_demographics(app):
@@ -585,7 +1019,7 @@ def update_demographics(app):
     row = CURSOR.fetchone()
     error_flag = row.ErrorFlag
     error_message = row.ErrorMessage
-    CNXN.commit()
+    commit()
 
     return error_flag, error_message
 
@@ -622,7 +1056,7 @@ def update_academic(app):
         app["CreateDateTime"],
         app["SetProgramStartDate"],
     )
-    CNXN.commit()
+    commit()
 
 
 def update_academic_key(app):
@@ -642,7 +1076,7 @@ def update_academic_key(app):
             app["CURRICULUM"],
             app["AcademicGUID"],
         )
-        CNXN.commit()
+        commit()
     else:
         CURSOR.execute(
             "exec [custom].[PS_updAcademicKey] ?, ?, ?, ?, ?, ?, ?, ?",
@@ -655,7 +1089,7 @@ def update_academic_key(app):
             app["CURRICULUM"],
             app["AcademicGUID"],
         )
-        CNXN.commit()
+        commit()
 
 
 def get_action_definition(action_id):
@@ -665,8 +1099,211 @@ def get_action_definition(action_id):
     return row
 
 
+def action_is_active(action_id):
+    """Return True if action_id is an active action definition, using the code tables if loaded."""
+    if CODE_TABLES is None:
+        return get_action_definition(action_id) is not None
+    return code_exists("ACTION_ACTIVE", action_id)
+
+
+def code_key(value):
+    """Normalize a code value the way SQL Server compares them: case-insensitive, ignoring trailing spaces."""
+    return str(value).rstrip().upper()
+
+
+def load_code_tables(ttl=None):
+    """Load the PowerCampus code values checked by the PS_upd* procedures, so rows can be validated before they're sent.
+
+    Keyword arguments:
+    ttl -- int. Seconds to keep using previously loaded tables, as in a long-running HTTP daemon. None reloads every time.
+    """
+    global CODE_TABLES
+    global CODE_TABLES_LOADED
+
+    if (
+        CODE_TABLES is not None
+        and ttl is not None
+        and time.monotonic() - CODE_TABLES_LOADED < ttl
+    ):
+        return
+
+    tables = {"ORGANIZATION": {}}
+    CURSOR.execute("EXEC [custom].[PS_selCodeTables]")
+    for row in CURSOR.fetchall():
+        value = code_key(row.CodeValue)
+        if row.TableName == "ORGANIZATION":
+            # Org identifiers aren't unique; PS_updEducation refuses duplicates
+            tables["ORGANIZATION"][value] = tables["ORGANIZATION"].get(value, 0) + 1
+        elif row.TableName == "ACTION":
+            tables.setdefault("ACTION", set()).add(value)
+            if row.CodeValue2 == "A":
+                tables.setdefault("ACTION_ACTIVE", set()).add(value)
+        elif row.CodeValue2 is not None:
+            tables.setdefault(row.TableName, set()).add(
+                (value, code_key(row.CodeValue2))
+            )
+        else:
+            tables.setdefault(row.TableName, set()).add(value)
+
+    CODE_TABLES = tables
+    CODE_TABLES_LOADED = time.monotonic()
+    verbose_print(
+        "Loaded "
+        + str(sum(len(v) for v in tables.values()))
+        + " code values for validation"
+    )
+
+
+def code_exists(table, *values):
+    """Return True if a code value, or a pair of values for two-column tables like CODE_TESTLINK, was loaded by load_code_tables()."""
+    if None in values:
+        return False
+    if len(values) == 1:
+        key = code_key(values[0])
+    else:
+        key = tuple(code_key(v) for v in values)
+    return key in CODE_TABLES.get(table, ())
+
+
+def validate_action(action, waive_reason_code):
+    """Return a list of the errors PS_updAction would raise for a Scheduled Action. Empty if code tables aren't loaded."""
+    errors = []
+    if CODE_TABLES is None:
+        return errors
+
+    if not code_exists("ACTION", action["action_id"]):
+        errors.append(f"@ActionID '{action['action_id']}' not found in ACTION.")
+    if waive_reason_code is not None and not code_exists(
+        "CODE_WAIVEDREASON", waive_reason_code
+    ):
+        errors.append(
+            f"@WaivedReason '{waive_reason_code}' not found in CODE_WAIVEDREASON."
+        )
+
+    return errors
+
+
+def validate_education(education):
+    """Return a list of the errors PS_updEducation would raise for an Education row. Empty if code tables aren't loaded."""
+    errors = []
+    if CODE_TABLES is None or education["OrgIdentifier"] is None:
+        return errors
+
+    org_count = CODE_TABLES["ORGANIZATION"].get(code_key(education["OrgIdentifier"]), 0)
+    if org_count > 1:
+        errors.append(
+            f"Multiple organizations found for Org Identifier '{education['OrgIdentifier']}'."
+        )
+    elif org_count == 1:
+        # The procedure skips a blank Degree or Curriculum, but only a NULL Honors
+        for field, table, skip in (
+            ("Degree", "CODE_DEGREE", (None, "")),
+            ("Curriculum", "CODE_CURRICULUM", (None, "")),
+            ("Honors", "CODE_HONORS", (None,)),
+        ):
+            if education[field] not in skip and not code_exists(
+                table, education[field]
+            ):
+                errors.append(f"@{field} '{education[field]}' not found in {table}.")
+
+    return errors
+
+
+def validate_test_scores(test):
+    """Return a list of the errors PS_updTestscore would raise for a Test Scores row. Empty if code tables aren't loaded."""
+    errors = []
+    if CODE_TABLES is None:
+        return errors
+
+    if not code_exists("CODE_TEST", test["TestType"]):
+        errors.append(f"@TestId '{test['TestType']}' not found in CODE_TEST.")
+        return errors
+
+    score_types = [
+        test[k]
+        for k in ps_models.get_arrays()["TestScoresNumeric"]
+        if k[:5] == "Score"
+        and k[-4:] == "Type"
+        and k != "ScoreAlphaType"
+        and k in test
+        and test[k[:-4]] is not None
+    ]
+    for score_type in score_types:
+        if not code_exists("CODE_TESTTYPE", score_type):
+            errors.append(f"@TestType '{score_type}' not found in CODE_TESTTYPE.")
+        elif not code_exists("CODE_TESTLINK", test["TestType"], score_type):
+            errors.append(
+                f"@TestType '{score_type}' not associated with @TestId '{test['TestType']}' in CODE_TESTTYPE."
+            )
+
+    return errors
+
+
+def validate_stop(stop):
+    """Return a list of the errors PS_updStop would raise for a Stop_from_Slate. Empty if code tables aren't loaded."""
+    errors = []
+    if CODE_TABLES is not None and not code_exists("CODE_STOPLIST", stop.stop_code):
+        errors.append(f"@StopReason '{stop.stop_code}' not found in CODE_STOPLIST.")
+
+    return errors
+
+
+def validate_scholarship(scholarship, validate_scholarship_level):
+    """Return a list of the errors PS_updScholarships would raise for a Scholarship_from_Slate. Empty if code tables aren't loaded."""
+    errors = []
+    if CODE_TABLES is None:
+        return errors
+
+    if not code_exists("SCHOLARSHIP", scholarship.scholarship):
+        errors.append(
+            f"@Scholarship '{scholarship.scholarship}' not found in SCHOLARSHIP."
+        )
+    if scholarship.department is not None and not code_exists(
+        "CODE_DEPARTMENT", scholarship.department
+    ):
+        errors.append(
+            f"@Department '{scholarship.department}' not found in CODE_DEPARTMENT."
+        )
+    if not code_exists("CODE_SCHOLARSHIPLEVEL", scholarship.level):
+        errors.append(
+            f"@Level '{scholarship.level}' not found in CODE_SCHOLARSHIPLEVEL."
+        )
+    elif validate_scholarship_level and not code_exists(
+        "SCHOLARSHIPLEVELS", scholarship.scholarship, scholarship.level
+    ):
+        errors.append(
+            f"@Scholarship / @Level combination '{scholarship.scholarship}/{scholarship.level}' not found in SCHOLARSHIPLEVELS."
+        )
+
+    return errors
+
+
+def validate_association(association):
+    """Return a list of the errors PS_updAssociation would raise for an Association_from_Slate. Empty if code tables aren't loaded."""
+    errors = []
+    if CODE_TABLES is None:
+        return errors
+
+    if not code_exists("CODE_ASSOCIATION", association.association):
+        errors.append(
+            f"@Association '{association.association}' not found in CODE_ASSOCIATION."
+        )
+    if not code_exists("CODE_OFFICEHELD", association.office_held):
+        errors.append(
+            f"@OfficeHeld '{association.office_held}' not found in CODE_OFFICEHELD."
+        )
+
+    return errors
+
+
 def update_action(
-    action, pcid, academic_year, academic_term, academic_session, waive_reason_code, mark_waived_completed
+    action,
+    pcid,
+    academic_year,
+    academic_term,
+    academic_session,
+    waive_reason_code,
+    mark_waived_completed,
 ):
     """Update a Scheduled Action in PowerCampus.
 
@@ -694,7 +1331,7 @@ def update_action(
         waive_reason_code,
         mark_waived_completed,
     )
-    CNXN.commit()
+    commit()
 
 
 def cleanup_actions(
@@ -753,7 +1390,7 @@ def cleanup_actions(
     # Delete each orphaned action
     for actionschedule_id in orphan_actions:
         CURSOR.execute("exec [custom].[PS_delAction] ?", actionschedule_id)
-        CNXN.commit()
+        commit()
 
 
 def update_smsoptin(app):
@@ -764,7 +1401,7 @@ def update_smsoptin(app):
             "SLATE",
             app["SMSOptIn"],
         )
-        CNXN.commit()
+        commit()
 
 
 def update_note(app, field, office, note_type):
@@ -775,7 +1412,7 @@ def update_note(app, field, office, note_type):
         note_type,
         app[field],
     )
-    CNXN.commit()
+    commit()
 
 
 def update_udf(app, slate_field, pc_field):
@@ -785,11 +1422,18 @@ def update_udf(app, slate_field, pc_field):
         pc_field,
         app[slate_field],
     )
-    CNXN.commit()
+    commit()
 
 
 def update_education(pcid, pid, education):
     """Insert or update a row in the EDUCATION table. Return whether or not the org identifier was found in PowerCampus."""
+    # Unknown orgs are a no-op in PS_updEducation, so skip the round trip if the code tables say so
+    if CODE_TABLES is not None and (
+        education["OrgIdentifier"] is None
+        or code_key(education["OrgIdentifier"]) not in CODE_TABLES["ORGANIZATION"]
+    ):
+        return {"pid": pid, "school_guid": education["GUID"], "org_found": False}
+
     CURSOR.execute(
         "exec [custom].[PS_updEducation] ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?",
         pcid,
@@ -812,7 +1456,7 @@ def update_education(pcid, pid, education):
         education["Quartile"],
     )
     row = CURSOR.fetchone()
-    CNXN.commit()
+    commit()
     org_found = row[0]
 
     output = {
@@ -888,7 +1532,7 @@ def update_test_scores(pcid, test):
             None,
             "SLATE",
         )
-    CNXN.commit()
+    commit()
 
 
 def update_stop(pcid, stop):
@@ -905,7 +1549,7 @@ def update_stop(pcid, stop):
         stop.comments,
         "SLATE",
     )
-    CNXN.commit()
+    commit()
 
 
 def update_app_form_autoprocess(app_form_setting_id, autoprocess):
@@ -914,7 +1558,7 @@ def update_app_form_autoprocess(app_form_setting_id, autoprocess):
         app_form_setting_id,
         autoprocess,
     )
-    CNXN.commit()
+    commit()
 
 
 def update_scholarship(pcid, scholarship, validate_scholarship_level):
@@ -939,7 +1583,7 @@ def update_scholarship(pcid, scholarship, validate_scholarship_level):
         "SLATE",
         validate_scholarship_level,
     )
-    CNXN.commit()
+    commit()
 
 
 def update_association(pcid, association):
@@ -957,7 +1601,7 @@ def update_association(pcid, association):
         association.office_held,
         "SLATE",
     )
-    CNXN.commit()
+    commit()
 
 
 def pf_get_fachecklist(pcid, govid, appid, year, term, session, use_finaidmapping):
@@ -985,6 +1629,34 @@ def pf_get_fachecklist(pcid, govid, appid, year, term, session, use_finaidmappin
     return checklist
 
 
+def pf_get_fachecklist_bulk(apps, use_finaidmapping, batch_size=1000):
+    """Yield the PowerFAIDS missing docs list for many apps with a single call to PS_selPFChecklistBulk.
+
+    Keyword arguments:
+    apps -- list of dicts with aid, AppID, PCID, GovID, AcademicYear, AcademicTerm, and AcademicSession
+    use_finaidmapping -- bool
+    batch_size -- rows to fetch from SQL Server at a time
+
+    Rows are fetched as the generator is consumed, so the list can be streamed into the upload to Slate.
+    """
+    if len(apps) == 0:
+        return
+
+    CURSOR.execute(
+        "exec [custom].[PS_selPFChecklistBulk] ?, ?",
+        json.dumps(apps),
+        use_finaidmapping,
+    )
+    columns = [column[0] for column in CURSOR.description]
+
+    while True:
+        rows = CURSOR.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(zip(columns, row))
+
+
 def pf_get_awards(pcid, govid, year, term, session, use_finaidmapping):
     """Return the PowerFAIDS awards list as XML and the Tracking Status."""
     awards = None
@@ -1006,3 +1678,29 @@ def pf_get_awards(pcid, govid, year, term, session, use_finaidmapping):
         tracking_status = row.tracking_status
 
     return awards, tracking_status
+
+
+def pf_get_awards_bulk(apps, use_finaidmapping):
+    """Return PowerFAIDS awards XML and Tracking Status for many apps with a single call to PS_selPFAwardsXMLBulk.
+
+    Keyword arguments:
+    apps -- list of dicts with aid, PCID, GovID, AcademicYear, AcademicTerm, and AcademicSession
+    use_finaidmapping -- bool
+
+    Returns:
+    awards -- dict like {aid: (awards, tracking_status)}. See pf_get_awards().
+    """
+    awards = {app["aid"]: (None, None) for app in apps}
+    if len(awards) == 0:
+        return awards
+
+    CURSOR.execute(
+        "exec [custom].[PS_selPFAwardsXMLBulk] ?, ?",
+        json.dumps(apps),
+        use_finaidmapping,
+    )
+    for row in CURSOR.fetchall():
+        if row.XML is not None:
+            awards[row.aid] = (row.XML, row.tracking_status)
+
+    return awards
@@ -0,0 +1,269 @@
+import datetime
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+
+CNXN = None
+LOCK = threading.RLock()
+
+
+def locked(func):
+    """Serialize use of CNXN, which is shared by sync_http's worker threads."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with LOCK:
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def init(state_file):
+    """Open (and create if necessary) the local SQLite state file."""
+    global CNXN
+
+    CNXN = sqlite3.connect(state_file, check_same_thread=False)
+    CNXN.execute(
+        "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)"
+    )
+    CNXN.execute(
+        "CREATE TABLE IF NOT EXISTS fingerprints (aid TEXT PRIMARY KEY, fingerprint TEXT, synced TEXT)"
+    )
+    CNXN.execute(
+        "CREATE TABLE IF NOT EXISTS sent_fields (aid TEXT PRIMARY KEY, hashes TEXT, sent TEXT)"
+    )
+    CNXN.execute(
+        "CREATE TABLE IF NOT EXISTS known_mappings (kind TEXT, value TEXT, PRIMARY KEY (kind, value))"
+    )
+    CNXN.commit()
+
+
+def de_init():
+    global CNXN
+
+    if CNXN:
+        CNXN.close()
+        CNXN = None
+
+
+@locked
+def get_setting(key, default=None):
+    row = CNXN.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return default
+    return json.loads(row[0])
+
+
+@locked
+def set_setting(key, value):
+    CNXN.execute(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+        (key, json.dumps(value)),
+    )
+    CNXN.commit()
+
+
+@locked
+def begin_run(full_sync_every):
+    """Return True if this incremental run should be a full resync.
+
+    full_sync_every -- int. Every Nth run ignores fingerprints. 0 or None disables forced resyncs.
+
+    Runs are counted by end_run() once they finish, so a failed run doesn't use up a turn. Every run is a full resync
+    until one has finished.
+    """
+    if not get_setting("full_sync_done", False):
+        return True
+
+    if full_sync_every:
+        return get_setting("run_count", 0) % full_sync_every == 0
+    else:
+        return False
+
+
+@locked
+def end_run(full_sync):
+    """Count an incremental run that finished, and remember if it was a full resync."""
+    set_setting("run_count", get_setting("run_count", 0) + 1)
+    if full_sync:
+        set_setting("full_sync_done", True)
+
+
+def fingerprint(app, actions):
+    """Return a hash of the parts of an app that drive PowerCampus updates.
+
+    Keyword arguments:
+    app -- an application dict from format_app_generic()
+    actions -- list of Scheduled Actions for the app, or None
+
+    Slate's compare_ fields and the error flag/message describe the last sync rather than the application, so they are excluded.
+    """
+    payload = {
+        k: v
+        for (k, v) in app.items()
+        if k[:8] != "compare_" and k not in ("error_flag", "error_message")
+    }
+    payload["actions"] = actions
+    payload = json.dumps(payload, sort_keys=True, default=str)
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@locked
+def get_unchanged(fingerprints):
+    """Return the set of aid's whose fingerprint matches the stored one.
+
+    fingerprints -- dict like {aid: fingerprint}
+    """
+    unchanged = set()
+    for aid, fp in CNXN.execute("SELECT aid, fingerprint FROM fingerprints"):
+        if fingerprints.get(aid) == fp:
+            unchanged.add(aid)
+
+    return unchanged
+
+
+@locked
+def save_fingerprints(fingerprints):
+    """Store fingerprints for apps that were written to PowerCampus successfully.
+
+    fingerprints -- dict like {aid: fingerprint}
+    """
+    synced = str(datetime.datetime.now())
+    CNXN.executemany(
+        "INSERT OR REPLACE INTO fingerprints (aid, fingerprint, synced) VALUES (?, ?, ?)",
+        [(aid, fp, synced) for (aid, fp) in fingerprints.items()],
+    )
+    CNXN.commit()
+
+
+def hash_value(value):
+    """Return a short hash of one field value, so large values like fa_awards XML aren't stored in full."""
+    value = json.dumps(value, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+@locked
+def diff_sent_fields(rows, force_full_refresh=False):
+    """Remove field values that match what was last sent to Slate for each app.
+
+    Keyword arguments:
+    rows -- list of flat dicts, each with an aid
+    force_full_refresh -- bool. Keep every value, but still return hashes so the snapshot is refreshed.
+
+    Returns:
+    changed -- list of dicts with aid and changed fields only. Apps with no changes are omitted.
+    hashes -- dict like {aid: {field: hash}} to pass to save_sent_fields() after a successful upload
+    """
+    sent = {}
+    if not force_full_refresh:
+        for aid, h in CNXN.execute(
+            "SELECT aid, hashes FROM sent_fields WHERE aid IN (SELECT value FROM json_each(?))",
+            (json.dumps([row["aid"] for row in rows]),),
+        ):
+            sent[aid] = json.loads(h)
+
+    changed = []
+    hashes = {}
+    for row in rows:
+        row_hashes = {k: hash_value(v) for (k, v) in row.items() if k != "aid"}
+        last = sent.get(row["aid"], {})
+        diff = {
+            k: v
+            for (k, v) in row.items()
+            if k != "aid" and last.get(k) != row_hashes[k]
+        }
+        if diff:
+            changed.append({"aid": row["aid"]} | diff)
+            hashes[row["aid"]] = last | row_hashes
+
+    return changed, hashes
+
+
+@locked
+def save_sent_fields(hashes):
+    """Store hashes of field values that were uploaded to Slate successfully.
+
+    hashes -- dict like {aid: {field: hash}}
+    """
+    sent = str(datetime.datetime.now())
+    CNXN.executemany(
+        "INSERT OR REPLACE INTO sent_fields (aid, hashes, sent) VALUES (?, ?, ?)",
+        [(aid, json.dumps(h), sent) for (aid, h) in hashes.items()],
+    )
+    CNXN.commit()
+
+
+@locked
+def prune(aids):
+    """Forget fingerprints and sent field values for apps that are no longer in the Slate query.
+
+    aids -- set of every aid returned by a complete run
+    """
+    for table in ("fingerprints", "sent_fields"):
+        CNXN.execute(
+            f"DELETE FROM {table} WHERE aid NOT IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(aids)),),
+        )
+    CNXN.commit()
+
+
+@locked
+def get_known_mappings(kind):
+    """Return the set of values already configured by autoconfigure_mappings.
+
+    kind -- str like 'program' or 'yearterm'
+    """
+    return {
+        value
+        for (value,) in CNXN.execute(
+            "SELECT value FROM known_mappings WHERE kind = ?", (kind,)
+        )
+    }
+
+
+@locked
+def add_known_mappings(kind, values):
+    """Remember values that autoconfigure_mappings validated and mapped successfully.
+
+    kind -- str like 'program' or 'yearterm'
+    values -- iterable of str
+    """
+    CNXN.executemany(
+        "INSERT OR IGNORE INTO known_mappings (kind, value) VALUES (?, ?)",
+        [(kind, value) for value in values],
+    )
+    CNXN.commit()
+
+
+@locked
+def get_learned_actions():
+    """Return action codes learned by single-person syncs since the last scheduled sync."""
+    return get_setting("learned_actions", [])
+
+
+@locked
+def add_learned_actions(action_ids):
+    """Remember action codes learned by a single-person sync, for the next scheduled sync to save.
+
+    action_ids -- list of str
+    """
+    learned_actions = get_learned_actions()
+    set_setting(
+        "learned_actions",
+        learned_actions + [a for a in action_ids if a not in learned_actions],
+    )
+
+
+@locked
+def remove_learned_actions(action_ids):
+    """Forget action codes once a scheduled sync has saved them to the config file.
+
+    action_ids -- list of str
+    """
+    set_setting(
+        "learned_actions",
+        [a for a in get_learned_actions() if a not in action_ids],
+    )
@@ -1,74 +1,447 @@
+import html
+import json
 import sys
+import threading
+import time
 import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import urllib
 import ps_core
+import ps_powercampus
 import socket
 
 
-CONFIG = ps_core.init(sys.argv[1])
-
-
 def emit_traceback():
     message = (
         "Technical error. Please notify support with the following message: <br /><br />"
-        + str(traceback.format_exc())
+        + html.escape(str(traceback.format_exc()))
     )
     return message
 
 
-class HTTPRequestHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        # Send response status code
-        self.send_response(200)
+def sync_pid(pid):
+    """Sync one person on the current thread, using a connection borrowed from the pool."""
+    with ps_powercampus.pooled_connection():
+        return ps_core.main_sync(pid)
 
-        # Send headers
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
 
-        # Send message back to client
-        q = urllib.parse.parse_qs(self.path[2:])
-        print(q)  # Debug
+class SyncCoalescer:
+    """Run at most one sync per pid at a time, and reuse recent results.
 
-        # Check for expected HTTP parameter, then sync that particular person record
-        try:
-            if "pid" in q:
-                message = ps_core.main_sync(q["pid"][0])
+    Requests for a pid that is already syncing wait for that sync and share its message, so a double-click or
+    several staff opening the same record cost one sync. A finished sync's message is served again for result_ttl
+    seconds. Errors are passed to every waiting request but never cached.
+    """
+
+    def __init__(self, sync_func, coalesce=True, result_ttl=0):
+        self.sync_func = sync_func
+        self.coalesce = coalesce
+        self.result_ttl = result_ttl
+        self.lock = threading.Lock()
+        self.in_flight = {}  # {pid: Future}
+        self.results = {}  # {pid: (time.monotonic() when finished, message)}
+        self.requests = 0
+        self.syncs = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def sync(self, pid):
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            cached = self.results.get(pid)
+            if cached is not None and now - cached[0] < self.result_ttl:
+                self.cache_hits += 1
+                return cached[1]
+
+            future = self.in_flight.get(pid)
+            if future is not None:
+                self.coalesced += 1
             else:
-                message = "Error: Record not found."
-        except Exception as ex:
-            # Re-initialize and try one more time before returning an error to the user
-            print("Attempting to recover from error:", emit_traceback())
+                self.syncs += 1
+                owner = Future()
+                if self.coalesce:
+                    self.in_flight[pid] = owner
+
+        if future is not None:
+            return future.result()
+
+        try:
+            message = self.sync_func(pid)
+        except BaseException as e:
+            owner.set_exception(e)
+            raise
+        else:
+            owner.set_result(message)
+        finally:
+            with self.lock:
+                if self.in_flight.get(pid) is owner:
+                    del self.in_flight[pid]
+
+        if self.result_ttl:
+            with self.lock:
+                now = time.monotonic()
+                self.results = {
+                    k: v
+                    for (k, v) in self.results.items()
+                    if now - v[0] < self.result_ttl
+                }
+                self.results[pid] = (now, message)
+
+        return message
+
+    def summary(self):
+        msg = "Requests: {}\nSyncs: {}\nCoalesced: {}\nCache hits: {}".format(
+            self.requests, self.syncs, self.coalesced, self.cache_hits
+        )
+        if self.requests > 0:
+            msg += "\nCoalesce rate: {:.1%}\nCache hit rate: {:.1%}".format(
+                self.coalesced / self.requests, self.cache_hits / self.requests
+            )
+        return msg
+
+
+class HealthMonitor:
+    """Keeps the SQL connections and PowerCampus API session of a long-running server healthy without a full re-init.
+
+    check() reconnects only the resource that failed. It runs every interval seconds on a background thread, if
+    interval is set, and after any failed sync. Recovery times are kept per resource, apart from the startup times
+    that ps_core.init() recorded.
+    """
+
+    def __init__(self, interval=None):
+        self.lock = threading.Lock()
+        self.startup = dict(ps_core.STARTUP_TIMES)
+        self.checks = 0
+        self.failures = 0
+        self.recoveries = {}  # {resource: [seconds, ...]}
+        self.stopped = threading.Event()
+        if interval:
+            threading.Thread(target=self.run, args=(interval,), daemon=True).start()
+
+    def check(self):
+        # One check at a time, so a burst of failed syncs reconnects once
+        with self.lock:
+            self.checks += 1
+            try:
+                recovered = ps_powercampus.health_check()
+            except Exception:
+                self.failures += 1
+                raise
+            for resource, seconds in recovered.items():
+                self.recoveries.setdefault(resource, []).append(seconds)
+        return recovered
+
+    def run(self, interval):
+        while not self.stopped.wait(interval):
             try:
-                ps_core.de_init()
-                CONFIG = ps_core.init(sys.argv[1])
-                message = ps_core.main_sync(q["pid"][0])
+                self.check()
             except Exception:
-                message = emit_traceback()
-                ps_core.de_init()
-                CONFIG = ps_core.init(sys.argv[1])
+                print("Health check failed:", traceback.format_exc())
+
+    def stop(self):
+        self.stopped.set()
+
+    def summary(self):
+        msg = "Startup: {:.3f} s ({})".format(
+            sum(self.startup.values()),
+            ", ".join(
+                "{} {:.3f} s".format(step, seconds)
+                for (step, seconds) in self.startup.items()
+            ),
+        )
+        msg += "\nHealth checks: {}\nFailed health checks: {}".format(
+            self.checks, self.failures
+        )
+        for resource, times in sorted(self.recoveries.items()):
+            msg += "\nReconnected {}: {} times, {:.1f} ms avg, {:.1f} ms max".format(
+                resource, len(times), sum(times) / len(times) * 1000, max(times) * 1000
+            )
+        return msg
+
+
+def sync_with_retry(coalescer, pid, health=None):
+    """Sync a pid through the coalescer and return the message for the user, retrying once on error.
+
+    With a HealthMonitor, the retry waits for a health check so that a failed SQL connection or API session is
+    reconnected first.
+    """
+    try:
+        return coalescer.sync(pid)
+    except Exception as ex:
+        # Try one more time before returning an error to the user.
+        # A broken connection was discarded by pooled_connection(), so the retry gets a fresh one.
+        print("Attempting to recover from error:", emit_traceback())
+        try:
+            if health is not None:
+                health.check()
+            return coalescer.sync(pid)
+        except EOFError as ex:
+            # main_sync() raises this with the configured no_apps message, which is HTML
+            return str(ex)
+        except Exception:
+            return emit_traceback()
+
+
+class Job:
+    """One queued pid sync, with its queue depth when submitted and wait/run times."""
+
+    def __init__(self, pid, queue_depth):
+        self.id = uuid.uuid4().hex
+        self.pid = pid
+        self.queue_depth = queue_depth
+        self.status = "queued"
+        self.message = None
+        self.queued = time.monotonic()
+        self.started = None
+        self.finished = None
+
+    def wait_time(self):
+        return (self.started or time.monotonic()) - self.queued
+
+    def run_time(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def dump(self):
+        return {
+            "job": self.id,
+            "pid": self.pid,
+            "status": self.status,
+            "queue_depth": self.queue_depth,
+            "wait_time": round(self.wait_time(), 3),
+            "run_time": round(self.run_time(), 3),
+            "message": self.message,
+        }
+
+    def status_page(self):
+        """Return HTML for the polling page, which refreshes itself until the job is done."""
+        if self.status == "done":
+            return self.message.replace("\n", "<br />")
+
+        return (
+            '<meta http-equiv="refresh" content="2; url=?job={}">'.format(self.id)
+            + "Sync {} for {}.<br />".format(self.status, html.escape(self.pid))
+            + "Jobs ahead when submitted: {}<br />".format(self.queue_depth)
+            + "Waited: {:.1f} s<br />Running: {:.1f} s".format(
+                self.wait_time(), self.run_time()
+            )
+        )
+
+
+class JobQueue:
+    """Runs queued syncs on a bounded pool of background workers, so HTTP requests return right away.
+
+    A pid that is already queued gets its queued job back instead of a new one. New jobs are refused while
+    max_outstanding jobs are queued or running. Finished jobs are kept for status requests until there are more than
+    history of them.
+    """
+
+    def __init__(self, sync_func, workers, max_outstanding=100, history=1000):
+        self.sync_func = sync_func
+        self.executor = ThreadPoolExecutor(workers)
+        self.max_outstanding = max_outstanding
+        self.history = history
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()  # {job id: Job}, oldest first
+        self.queued = {}  # {pid: Job} for jobs that haven't started
+        self.outstanding = 0  # Queued or running
+        self.rejected = 0
 
-        # Sent message back to client after replacing newlines with HTML line breaks
-        message = message.replace("\n", "<br />")
+    def submit(self, pid):
+        """Queue a sync for pid and return its Job, or None if the queue is full."""
+        with self.lock:
+            job = self.queued.get(pid)
+            if job is not None:
+                return job
+            if self.outstanding >= self.max_outstanding:
+                self.rejected += 1
+                return None
+
+            job = Job(pid, self.outstanding)
+            self.jobs[job.id] = job
+            self.queued[pid] = job
+            self.outstanding += 1
+            while len(self.jobs) > self.history:
+                oldest = next(iter(self.jobs.values()))
+                if oldest.status != "done":
+                    break
+                self.jobs.popitem(last=False)
+
+        self.executor.submit(self.run, job)
+        return job
+
+    def run(self, job):
+        with self.lock:
+            del self.queued[job.pid]
+        job.started = time.monotonic()
+        job.status = "running"
+        try:
+            job.message = self.sync_func(job.pid)
+        finally:
+            job.finished = time.monotonic()
+            job.status = "done"
+            with self.lock:
+                self.outstanding -= 1
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def summary(self):
+        with self.lock:
+            running = sum(1 for j in self.jobs.values() if j.status == "running")
+            return "Queued jobs: {}\nRunning jobs: {}\nRejected jobs: {}".format(
+                self.outstanding - running, running, self.rejected
+            )
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+class HTTPRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        q = urllib.parse.parse_qs(self.path[2:])
+        print(q)  # Debug
+
+        # Check for expected HTTP parameter, then sync that particular person record.
+        # With a job queue, queue the sync and return a status page that polls ?job= instead.
+        content_type = "text/html"
+        jobs = self.server.jobs
+        if "pid" in q and jobs is not None:
+            job = jobs.submit(q["pid"][0])
+            if job is not None:
+                message = job.status_page()
+            else:
+                message = "Error: Too many syncs are waiting. Please try again in a few minutes."
+        elif "pid" in q:
+            message = sync_with_retry(
+                self.server.coalescer, q["pid"][0], self.server.health
+            )
+            message = message.replace("\n", "<br />")
+        elif "job" in q and jobs is not None and jobs.get(q["job"][0]) is not None:
+            job = jobs.get(q["job"][0])
+            if q.get("format") == ["json"]:
+                content_type = "application/json"
+                message = json.dumps(job.dump())
+            else:
+                message = job.status_page()
+        elif self.path == "/stats":
+            message = self.server.coalescer.summary()
+            if jobs is not None:
+                message += "\n" + jobs.summary()
+            if self.server.health is not None:
+                message += "\n" + self.server.health.summary()
+            message = message.replace("\n", "<br />")
+        else:
+            message = "Error: Record not found."
+
+        # Send response status code and headers, then the message
+        self.send_response(200)
+        self.send_header("Content-type", content_type)
+        self.end_headers()
         self.wfile.write(message.encode("utf8"))
         return
 
 
-def run_server():
-    # Run the web server and idle indefinitely, listening for requests.
-    print("starting server...")
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles requests on a fixed number of worker threads.
+
+    Requests beyond the worker count are accepted and wait for a free worker, so one slow sync doesn't block the others.
+    """
 
+    # Room for bursts of clicks; the default backlog of 5 makes extra connections retry after a second
+    request_queue_size = 128
+
+    def __init__(
+        self, server_address, handler_class, workers, coalescer, jobs=None, health=None
+    ):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(workers)
+        self.coalescer = coalescer
+        self.jobs = jobs
+        self.health = health
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+        if self.jobs is not None:
+            self.jobs.shutdown()
+        if self.health is not None:
+            self.health.stop()
+
+
+def concurrent_syncs(config):
+    """Return how many syncs the server runs at once: its job workers in async mode, otherwise its HTTP workers."""
+    if config["http_async"]:
+        return config["http_job_workers"] or 1
+    return config["http_workers"] or 1
+
+
+def make_server(config, handler_class=HTTPRequestHandler):
+    """Return a PooledHTTPServer for the address, worker count, coalescing, job queue, and health check settings in config.
+
+    ps_core.init() must already have been called with concurrent_syncs(config); the server reuses its connections for its whole life.
+    """
     # Server settings
     # Choose port 8080, for port 80, which is normally used for a http server, you need root access
     # Use IP address from config file, if present, otherwise fall back to DNS lookup
-    if "http_ip" in CONFIG and CONFIG["http_ip"] is not None:
-        local_ip = CONFIG["http_ip"]
+    if "http_ip" in config and config["http_ip"] is not None:
+        local_ip = config["http_ip"]
     else:
         local_ip = socket.gethostbyname(socket.gethostname())
-    server_address = (local_ip, CONFIG["http_port"])
-    httpd = HTTPServer(server_address, HTTPRequestHandler)
+    server_address = (local_ip, config["http_port"])
+
+    coalescer = SyncCoalescer(
+        sync_pid, config["http_coalesce"], config["http_result_ttl"] or 0
+    )
+
+    health = HealthMonitor(config["http_health_interval"])
+
+    # In async mode, HTTP workers only queue jobs and serve status pages; job workers run the syncs
+    jobs = None
+    if config["http_async"]:
+        jobs = JobQueue(
+            lambda pid: sync_with_retry(coalescer, pid, health),
+            config["http_job_workers"] or 1,
+            config["http_max_queued_jobs"] or 100,
+        )
+
+    return PooledHTTPServer(
+        server_address,
+        handler_class,
+        config["http_workers"] or 1,
+        coalescer,
+        jobs,
+        health,
+    )
+
+
+def run_server(config):
+    # Run the web server and idle indefinitely, listening for requests.
+    print("starting server...")
+    httpd = make_server(config)
     print("running server...")
     httpd.serve_forever()
 
 
-run_server()
+if __name__ == "__main__":
+    CONFIG = ps_core.init(
+        sys.argv[1], concurrent_syncs(ps_core.read_config(sys.argv[1]))
+    )
+    run_server(CONFIG)
@@ -16,11 +16,7 @@ if __name__ == "__main__":
         ps_core.main_sync()
         print("Done at " + str(datetime.datetime.now()))
     except Exception as e:
-        # There's got to be a better way to handle this.
-        try:
-            current_record = ps_core.CURRENT_RECORD
-        except AttributeError:
-            current_record = None
+        current_record = ps_core.current_record()
 
         # Close SQL connections
         ps_core.de_init()